@@ -0,0 +1,197 @@
+import math
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Доля записей, после которых чистим просроченное и лишнее.
+CULL_PROBABILITY = 0.01
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, '
+    'delta REAL NOT NULL DEFAULT 0)'
+)
+
+
+class SQLiteCache(BaseCache):
+    """Кеш в файле SQLite, общий для всех процессов на одной машине.
+
+    В отличие от LocMemCache инвалидация из одного воркера сразу видна
+    остальным, а incr и add атомарны между процессами. get_or_set
+    защищает от «стада»: значение пересчитывается заранее с вероятностью,
+    растущей к концу TTL (probabilistic early expiration), и только одним
+    воркером — остальные отдают ещё живое значение или ждут результат.
+
+    OPTIONS: BETA — агрессивность раннего пересчёта, LOCK_TIMEOUT — сколько
+    секунд один воркер может держать пересчёт ключа.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._beta = options.get('BETA', 1.0)
+        self._lock_timeout = options.get('LOCK_TIMEOUT', 10)
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        # Соединение своё у каждого потока и у каждого процесса после fork.
+        if getattr(self._local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None
+            )
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return self._local.conn
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _read(self, key):
+        """(value, expires, delta) живой записи или None."""
+        row = self._db.execute(
+            'SELECT value, expires, delta FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)', (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0]), row[1], row[2]
+
+    def _write(self, key, value, expires, delta=0.0, replace=True):
+        verb = 'REPLACE' if replace else 'IGNORE'
+        cursor = self._db.execute(
+            f'INSERT OR {verb} INTO cache (key, value, expires, delta) '
+            'VALUES (?, ?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+             expires, delta),
+        )
+        if random.random() < CULL_PROBABILITY:
+            self._cull()
+        return cursor.rowcount > 0
+
+    def _cull(self):
+        db = self._db
+        db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        total = db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if total > self._max_entries:
+            db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT ?)',
+                (total // self._cull_frequency,),
+            )
+
+    def get(self, key, default=None, version=None):
+        row = self._read(self._key(key, version))
+        return default if row is None else row[0]
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(
+            self._key(key, version), value, self.get_backend_timeout(timeout)
+        )
+
+    def _add(self, key, value, expires):
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (key, time.time()),
+            )
+            added = self._write(key, value, expires, replace=False)
+        finally:
+            db.execute('COMMIT')
+        return added
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._add(
+            self._key(key, version), value, self.get_backend_timeout(timeout)
+        )
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = self._read(key)
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = row[0] + delta
+            db.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key),
+            )
+        finally:
+            db.execute('COMMIT')
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), self._key(key, version),
+             time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def has_key(self, key, version=None):
+        return self._read(self._key(key, version)) is not None
+
+    def delete(self, key, version=None):
+        self._db.execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),)
+        )
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение живёт весь поток: открывать файл на каждый запрос дорого.
+        pass
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        if not callable(default):
+            return super().get_or_set(key, default, timeout, version)
+        key = self._key(key, version)
+        row = self._read(key)
+        if row is not None:
+            value, expires, delta = row
+            # XFetch: чем дольше пересчёт и ближе конец TTL, тем вероятнее,
+            # что этот запрос пересчитает значение заранее.
+            early = delta * self._beta * -math.log(1 - random.random())
+            if expires is None or time.time() + early < expires:
+                return value
+        lock = f'{key}:lock'
+        if self._add(lock, None, time.time() + self._lock_timeout):
+            try:
+                started = time.monotonic()
+                value = default()
+                self._write(
+                    key, value, self.get_backend_timeout(timeout),
+                    time.monotonic() - started,
+                )
+            finally:
+                self._db.execute('DELETE FROM cache WHERE key = ?', (lock,))
+            return value
+        if row is not None:
+            return row[0]
+        deadline = time.monotonic() + self._lock_timeout
+        while time.monotonic() < deadline and self._read(lock) is not None:
+            time.sleep(0.05)
+            row = self._read(key)
+            if row is not None:
+                return row[0]
+        value = default()
+        self._write(key, value, self.get_backend_timeout(timeout))
+        return value
@@ -0,0 +1,70 @@
+import random
+import re
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connections, router, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+# Сколько раз run_locked пробует транзакцию, если база так и не
+# освободилась за busy_timeout.
+LOCK_ATTEMPTS = 5
+
+
+def pragma_statements(pragmas):
+    """PRAGMA-инструкции из словаря {имя: значение}."""
+    for name, value in pragmas.items():
+        if not PRAGMA_NAME.match(name):
+            raise ValueError(f'Недопустимое имя прагмы: {name!r}')
+        if not isinstance(value, int) and not PRAGMA_NAME.match(str(value)):
+            raise ValueError(f'Недопустимое значение прагмы {name}: {value!r}')
+        yield f'PRAGMA {name} = {value}'
+
+
+@receiver(connection_created)
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    """Настраивает каждое новое соединение с SQLite по SQLITE_PRAGMAS.
+
+    Прагмы вроде synchronous и cache_size живут только в соединении,
+    поэтому их нельзя выставить один раз при миграции базы.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(
+            getattr(settings, 'SQLITE_PRAGMAS', {})
+        ):
+            cursor.execute(statement)
+
+
+def run_locked(model, func, *args, using=None):
+    """Выполняет func(*args) в транзакции, которая первым делом берёт
+    блокировку записи, и повторяет её, если база занята.
+
+    Отложенная транзакция SQLite, которая сначала читает, а потом пишет,
+    при конкурентной записи сразу получает «database is locked»:
+    busy_timeout тут не помогает, потому что её снимок уже устарел.
+    Пустой DELETE в начале транзакции ждёт блокировку по busy_timeout,
+    как обычная запись, и чтение дальше идёт уже под ней.
+    """
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    outermost = not connection.in_atomic_block
+    for attempt in range(LOCK_ATTEMPTS):
+        try:
+            with transaction.atomic(using=using):
+                if connection.vendor == 'sqlite':
+                    with connection.cursor() as cursor:
+                        cursor.execute('DELETE FROM {} WHERE 0'.format(
+                            connection.ops.quote_name(model._meta.db_table)
+                        ))
+                return func(*args)
+        except OperationalError as error:
+            # Внутри чужой транзакции повторять нельзя: она уже сорвана.
+            if not outermost or 'locked' not in str(error) or (
+                attempt + 1 == LOCK_ATTEMPTS
+            ):
+                raise
+            time.sleep(random.uniform(0, 0.05 * 2 ** attempt))
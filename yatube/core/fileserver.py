@@ -0,0 +1,207 @@
+"""Отдача статики и медиа на уровне WSGI, мимо URL-роутинга Django.
+
+FileServer оборачивает приложение в yatube.wsgi и отвечает сам на GET
+и HEAD к файлам из STATIC_ROOT и MEDIA_ROOT; остальные запросы, в том
+числе к несуществующим файлам, уходят в Django.
+
+- Файлы с хешем в имени (их делает core.staticfiles) и картинки постов,
+  имена которых тоже строятся по содержимому, кешируются клиентом
+  на год с immutable; прочее — на FILE_SERVER_MAX_AGE секунд.
+- ETag и Last-Modified берутся из stat файла, условные запросы получают
+  304 без чтения файла.
+- Один диапазон Range отдаётся как 206; If-Range учитывается.
+- Без Range выбирается заранее сжатая копия .br или .gz, если клиент
+  её принимает.
+- С FILE_SERVER_OFFLOAD тело отдаёт front-прокси: приложение ставит
+  заголовки кеша и X-Sendfile или X-Accel-Redirect, а Range и сжатие
+  остаются прокси.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+
+FOREVER = 60 * 60 * 24 * 365
+CHUNK_SIZE = 64 * 1024
+# Хеш ManifestStaticFilesStorage: 12 шестнадцатеричных знаков перед
+# расширением.
+HASHED = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+SENDFILE = 'X-Sendfile'
+ACCEL_REDIRECT = 'X-Accel-Redirect'
+
+
+def _read(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _accepts(environ, encoding):
+    for part in environ.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        token, _, params = part.partition(';')
+        if token.strip() == encoding:
+            try:
+                return float(params.strip().partition('q=')[2] or 1) > 0
+            except ValueError:
+                return False
+    return False
+
+
+def _encoded(environ, path):
+    """Сжатая копия path, которую принимает клиент, и её заголовки."""
+    variants = [
+        (encoding, path + suffix) for encoding, suffix in ENCODINGS
+        if os.path.isfile(path + suffix)
+    ]
+    if not variants:
+        return path, []
+    headers = [('Vary', 'Accept-Encoding')]
+    for encoding, variant in variants:
+        if _accepts(environ, encoding):
+            return variant, headers + [('Content-Encoding', encoding)]
+    return path, headers
+
+
+def _not_modified(environ, etag, mtime):
+    if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags
+    since = parse_http_date_safe(environ.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and int(mtime) <= since
+
+
+def _range(environ, etag, mtime, size):
+    """(начало, длина) из Range, False для неудовлетворимого диапазона
+    и None, если отдавать надо весь файл."""
+    match = RANGE.match(environ.get('HTTP_RANGE', '').strip())
+    if match is None:
+        return None
+    if_range = environ.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag and (
+        parse_http_date_safe(if_range) != int(mtime)
+    ):
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        start = max(size - int(last), 0)
+        end = size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end - start + 1
+
+
+class FileServer:
+    """WSGI-обёртка, которая сама отдаёт статику и медиа."""
+
+    def __init__(self, application):
+        self.application = application
+        self.mounts = [
+            (url, root, immutable)
+            for url, root, immutable in (
+                (settings.STATIC_URL, settings.STATIC_ROOT, False),
+                (settings.MEDIA_URL, settings.MEDIA_ROOT, True),
+            )
+            if root and url and url.startswith('/')
+        ]
+        self.offload = settings.FILE_SERVER_OFFLOAD
+        self.accel_prefix = settings.FILE_SERVER_ACCEL_PREFIX.rstrip('/')
+        self.max_age = settings.FILE_SERVER_MAX_AGE
+
+    def __call__(self, environ, start_response):
+        found = self.find(environ.get('PATH_INFO', ''))
+        if found is None:
+            return self.application(environ, start_response)
+        if environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            start_response(
+                '405 Method Not Allowed', [('Allow', 'GET, HEAD')]
+            )
+            return []
+        return self.serve(environ, start_response, *found)
+
+    def find(self, url_path):
+        """(путь к файлу, Cache-Control) или None, если файла нет."""
+        for url, root, immutable in self.mounts:
+            if not url_path.startswith(url):
+                continue
+            try:
+                path = safe_join(root, url_path[len(url):])
+            except SuspiciousFileOperation:
+                return None
+            if not os.path.isfile(path):
+                return None
+            if immutable or HASHED.search(path):
+                return path, f'public, max-age={FOREVER}, immutable'
+            return path, f'public, max-age={self.max_age}'
+        return None
+
+    def serve(self, environ, start_response, path, cache_control):
+        content_type, _ = mimetypes.guess_type(path)
+        headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Cache-Control', cache_control),
+            ('Accept-Ranges', 'bytes'),
+        ]
+        served = path
+        if not self.offload and 'HTTP_RANGE' not in environ:
+            served, encoded = _encoded(environ, path)
+            headers += encoded
+        stat = os.stat(served)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        headers += [
+            ('ETag', etag), ('Last-Modified', http_date(stat.st_mtime)),
+        ]
+        if _not_modified(environ, etag, stat.st_mtime):
+            start_response('304 Not Modified', headers)
+            return []
+        if self.offload:
+            start_response('200 OK', headers + [self.offload_header(
+                path, environ['PATH_INFO']
+            )])
+            return []
+        start, length = 0, stat.st_size
+        status = '200 OK'
+        requested = _range(environ, etag, stat.st_mtime, stat.st_size)
+        if requested is False:
+            start_response('416 Range Not Satisfiable', headers + [
+                ('Content-Range', f'bytes */{stat.st_size}'),
+                ('Content-Length', '0'),
+            ])
+            return []
+        if requested:
+            start, length = requested
+            status = '206 Partial Content'
+            headers.append((
+                'Content-Range',
+                f'bytes {start}-{start + length - 1}/{stat.st_size}',
+            ))
+        headers.append(('Content-Length', str(length)))
+        start_response(status, headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if requested is None and file_wrapper is not None:
+            return file_wrapper(open(served, 'rb'), CHUNK_SIZE)
+        return _read(served, start, length)
+
+    def offload_header(self, path, url_path):
+        if self.offload == SENDFILE:
+            return SENDFILE, path
+        return ACCEL_REDIRECT, quote(self.accel_prefix + url_path)
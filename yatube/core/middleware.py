@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+
+from . import routers
+
+SESSION_KEY = '_primary_until'
+
+
+class ReplicaMiddleware:
+    """Закрепляет за основной базой сессию, которая только что писала:
+    создавала или правила пост, комментировала, подписывалась."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'DATABASE_REPLICAS', ()):
+            return self.get_response(request)
+        routers.start_request(
+            request.session.get(SESSION_KEY, 0) > time.time()
+        )
+        try:
+            response = self.get_response(request)
+            if routers.wrote():
+                request.session[SESSION_KEY] = (
+                    time.time() + settings.REPLICA_STICKY_SECONDS
+                )
+        finally:
+            routers.finish_request()
+        return response
@@ -0,0 +1,77 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Сессию читают раньше, чем становится ясно, закреплён ли запрос за
+# основной базой, и отставшая реплика «разлогинила» бы пользователя.
+PRIMARY_APPS = {'sessions'}
+
+_state = threading.local()
+
+
+def start_request(sticky):
+    """Начало запроса; sticky — сессия недавно писала в основную базу."""
+    _state.sticky, _state.wrote = sticky, False
+
+
+def finish_request():
+    _state.sticky = _state.wrote = False
+
+
+def wrote():
+    """Была ли запись в основную базу с начала запроса."""
+    return getattr(_state, 'wrote', False)
+
+
+@contextmanager
+def use_primary():
+    """Все чтения внутри блока идут в основную базу."""
+    _state.pinned = getattr(_state, 'pinned', 0) + 1
+    try:
+        yield
+    finally:
+        _state.pinned -= 1
+
+
+def _on_primary():
+    return (
+        getattr(_state, 'pinned', 0) > 0
+        or getattr(_state, 'sticky', False)
+        or wrote()
+        # Чтение внутри транзакции должно видеть её же записи.
+        or connections[DEFAULT_DB_ALIAS].in_atomic_block
+    )
+
+
+class ReplicaRouter:
+    """Чтения — в реплики из DATABASE_REPLICAS, запись — в default.
+
+    После первой записи запрос до конца читает из default, а
+    ReplicaMiddleware закрепляет сессию за default ещё на
+    REPLICA_STICKY_SECONDS: автор видит свой пост, даже если реплика
+    отстаёт. Без реплик роутер ни на что не влияет.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Связанные объекты читаем оттуда же, откуда сам объект.
+            return instance._state.db
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        if (
+            not replicas or _on_primary()
+            or model._meta.app_label in PRIMARY_APPS
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default, объекты из них можно связывать.
+        return True
@@ -0,0 +1,59 @@
+"""Статика с хешем в имени и заранее сжатыми копиями.
+
+collectstatic раскладывает файлы так же, как ManifestStaticFilesStorage
+(имя с хешем содержимого и staticfiles.json), и рядом с каждым текстовым
+файлом кладёт .gz, а если установлен brotli — ещё и .br. Сжатие идёт
+один раз при сборке, core.fileserver только выбирает готовую копию
+по Accept-Encoding.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.svg', '.txt', '.html', '.json', '.xml',
+    '.ico', '.ttf', '.eot',
+)
+# Мелочь не сжимаем: заголовки съедят выигрыш.
+MIN_SIZE = 256
+
+
+def _compressors():
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                names.update((name, hashed_name))
+            yield name, hashed_name, processed
+        if not dry_run:
+            for name in sorted(names):
+                self.compress(name)
+
+    def compress(self, name):
+        """Кладёт рядом с name сжатые копии, если они заметно меньше."""
+        if not name.endswith(COMPRESSIBLE):
+            return
+        with self.open(name) as file:
+            data = file.read()
+        if len(data) < MIN_SIZE:
+            return
+        for suffix, compress in _compressors():
+            compressed = compress(data)
+            if len(compressed) < len(data) * 0.9:
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(compressed))
@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+import threading
+import time
+from os import path
+
+from django.test import SimpleTestCase
+
+from ..cache import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = path.join(self.directory, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.location, {'OPTIONS': options})
+
+    def test_basic_operations(self):
+        """set/get/add/delete работают как у встроенных бэкендов."""
+        self.cache.set('key', {'a': 1})
+        self.assertEqual(self.cache.get('key'), {'a': 1})
+        self.assertFalse(self.cache.add('key', 'другое'))
+        self.cache.set('short', 1, timeout=-1)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertTrue(self.cache.add('short', 2))
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_shared_between_instances(self):
+        """Второй экземпляр (другой воркер) видит запись и incr первого."""
+        other = self.make_cache()
+        self.cache.set('version', 1, None)
+        self.assertEqual(other.incr('version'), 2)
+        self.assertEqual(self.cache.get('version'), 2)
+
+    def test_single_flight(self):
+        """Пропавший горячий ключ пересчитывает только один поток."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'страница'
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    self.cache.get_or_set('hot', compute, 60)
+                )
+            )
+            for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['страница'] * 8)
+
+    def test_early_expiration(self):
+        """Ключ с долгим пересчётом обновляется до истечения TTL."""
+        cache = self.make_cache(BETA=10 ** 6)
+        cache.get_or_set('slow', lambda: time.sleep(0.01) or 'старое', 1)
+        self.assertEqual(cache.get_or_set('slow', lambda: 'новое', 1), 'новое')
+        self.assertEqual(cache.get('slow'), 'новое')
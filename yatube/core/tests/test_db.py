@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import threading
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from posts.models import PostCounter
+
+from ..db import pragma_statements, run_locked
+
+CONCURRENT = 'concurrent'
+
+
+class PragmaStatementsTests(SimpleTestCase):
+    def test_statements(self):
+        """Словарь прагм превращается в PRAGMA-инструкции."""
+        self.assertEqual(
+            list(pragma_statements({'synchronous': 'normal', 'x': -1})),
+            ['PRAGMA synchronous = normal', 'PRAGMA x = -1'],
+        )
+
+    def test_rejects_injection(self):
+        """Имя и значение не могут протащить лишний SQL."""
+        for pragmas in ({'a; DROP': 1}, {'synchronous': 'off; DROP'}):
+            with self.subTest(pragmas=pragmas):
+                with self.assertRaises(ValueError):
+                    list(pragma_statements(pragmas))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'прагмы SQLite')
+class ConnectionPragmasTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_PRAGMAS={
+        'busy_timeout': 1234, 'temp_store': 'memory',
+        'cache_size': -1024,
+    })
+    def test_new_connection_gets_pragmas(self):
+        """Прагмы из настроек применяются к каждому новому соединению."""
+        connection_created.send(sender=type(connection), connection=connection)
+        self.assertEqual(self.pragma('busy_timeout'), 1234)
+        self.assertEqual(self.pragma('temp_store'), 2)
+        self.assertEqual(self.pragma('cache_size'), -1024)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'блокировки SQLite')
+class RunLockedTests(SimpleTestCase):
+    """Конкурентные писатели на файловой базе в WAL, как в продакшене:
+    тестовая база в памяти с общим кешем блокируется иначе."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        connections.databases[CONCURRENT] = dict(
+            connections.databases['default'],
+            NAME=os.path.join(directory, 'concurrent.sqlite3'),
+        )
+        self.addCleanup(connections.databases.pop, CONCURRENT)
+        self.addCleanup(connections[CONCURRENT].close)
+        with connections[CONCURRENT].schema_editor() as editor:
+            editor.create_model(PostCounter)
+        PostCounter.objects.using(CONCURRENT).create(key='n')
+
+    def test_concurrent_read_modify_write(self):
+        """Чтение с последующей записью из нескольких потоков не падает
+        с «database is locked» и не теряет правки."""
+        errors = []
+
+        def increment():
+            counter = PostCounter.objects.using(CONCURRENT).get(key='n')
+            counter.value += 1
+            counter.save(using=CONCURRENT)
+
+        def work():
+            try:
+                for _ in range(30):
+                    run_locked(PostCounter, increment, using=CONCURRENT)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections[CONCURRENT].close()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            PostCounter.objects.using(CONCURRENT).get(key='n').value, 120
+        )
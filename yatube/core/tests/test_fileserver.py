@@ -0,0 +1,118 @@
+import gzip
+import os
+import shutil
+import tempfile
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from ..fileserver import FOREVER, FileServer
+
+TEMP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CSS = b'body { color: teal; }\n' * 20
+
+
+def django_app(environ, start_response):
+    start_response('404 Not Found', [])
+    return [b'django']
+
+
+@override_settings(
+    STATIC_ROOT=os.path.join(TEMP_ROOT, 'static'),
+    MEDIA_ROOT=os.path.join(TEMP_ROOT, 'media'),
+)
+class FileServerTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for path, content in (
+            ('static/css/site.0123456789ab.css', CSS),
+            ('static/css/site.0123456789ab.css.gz', gzip.compress(CSS)),
+            ('static/robots.txt', b'User-agent: *\n'),
+            ('media/posts/ab/cd/abcd.gif', b'GIF89a' + bytes(94)),
+        ):
+            path = os.path.join(TEMP_ROOT, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(content)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_ROOT, ignore_errors=True)
+
+    def get(self, path, **headers):
+        environ = {'PATH_INFO': path, **headers}
+        setup_testing_defaults(environ)
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = int(status.split()[0])
+            response['headers'] = dict(headers)
+
+        body = b''.join(FileServer(django_app)(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def test_full_response(self):
+        """Файл отдаётся целиком с ETag, а хешированный — на год."""
+        status, headers, body = self.get('/static/css/site.0123456789ab.css')
+        self.assertEqual((status, body), (200, CSS))
+        self.assertEqual(headers['Content-Type'], 'text/css')
+        self.assertEqual(
+            headers['Cache-Control'], f'public, max-age={FOREVER}, immutable'
+        )
+        self.assertIn('ETag', headers)
+        status, headers, body = self.get('/static/robots.txt')
+        self.assertEqual(headers['Cache-Control'], 'public, max-age=3600')
+
+    def test_conditional(self):
+        """Совпавший ETag получает 304 без тела."""
+        etag = self.get('/media/posts/ab/cd/abcd.gif')[1]['ETag']
+        status, headers, body = self.get(
+            '/media/posts/ab/cd/abcd.gif', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual((status, body), (304, b''))
+
+    def test_range(self):
+        """Range отдаёт кусок со статусом 206, а запредельный — 416."""
+        status, headers, body = self.get(
+            '/media/posts/ab/cd/abcd.gif', HTTP_RANGE='bytes=0-5'
+        )
+        self.assertEqual((status, body), (206, b'GIF89a'))
+        self.assertEqual(headers['Content-Range'], 'bytes 0-5/100')
+        self.assertEqual(self.get(
+            '/media/posts/ab/cd/abcd.gif', HTTP_RANGE='bytes=-10'
+        )[2], bytes(10))
+        self.assertEqual(self.get(
+            '/media/posts/ab/cd/abcd.gif', HTTP_RANGE='bytes=500-'
+        )[0], 416)
+
+    def test_precompressed(self):
+        """Клиенту с gzip отдаётся заранее сжатая копия."""
+        status, headers, body = self.get(
+            '/static/css/site.0123456789ab.css',
+            HTTP_ACCEPT_ENCODING='gzip, deflate',
+        )
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(body), CSS)
+
+    def test_missing_and_unsafe_paths_go_to_django(self):
+        """Нет файла или путь выходит из каталога — отвечает Django."""
+        for path in (
+            '/static/nope.css', '/static/../media/posts/ab/cd/abcd.gif',
+            '/posts/',
+        ):
+            self.assertEqual(self.get(path)[2], b'django')
+
+    @override_settings(FILE_SERVER_OFFLOAD='X-Accel-Redirect')
+    def test_offload(self):
+        """За nginx тело отдаёт прокси по X-Accel-Redirect."""
+        status, headers, body = self.get('/media/posts/ab/cd/abcd.gif')
+        self.assertEqual((status, body), (200, b''))
+        self.assertEqual(
+            headers['X-Accel-Redirect'],
+            '/protected/media/posts/ab/cd/abcd.gif',
+        )
+        self.assertIn('ETag', headers)
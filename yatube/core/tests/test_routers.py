@@ -0,0 +1,75 @@
+from django.contrib.sessions.models import Session
+from django.test import (Client, SimpleTestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .. import routers
+from ..routers import ReplicaRouter
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        routers.start_request(False)
+        self.addCleanup(routers.finish_request)
+
+    def test_reads_go_to_replica(self):
+        """Чтение идёт в реплику, запись — в основную базу."""
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_read_after_write(self):
+        """После записи запрос читает только из основной базы."""
+        self.router.db_for_write(Post)
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_primary_reads(self):
+        """Сессии, закреплённые запросы и use_primary читают из default."""
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+        with routers.use_primary():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        routers.start_request(True)
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReadYourWritesTests(TransactionTestCase):
+    """Реплика здесь не получает записей вовсе — как при отставании."""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.reader = User.objects.create(username='reader')
+        for user in (self.author, self.reader):
+            User.objects.using('replica').create(
+                pk=user.pk, username=user.username
+            )
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def create_post(self):
+        self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Свой пост'}
+        )
+        return reverse('posts:post_detail', args=(Post.objects.get().pk,))
+
+    def test_author_sees_own_post(self):
+        """Автор сразу видит свой пост, остальные читают реплику."""
+        url = self.create_post()
+        self.assertEqual(self.author_client.get(url).status_code, 200)
+        self.assertEqual(self.reader_client.get(url).status_code, 404)
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_sticky_window_expires(self):
+        """Когда окно закрепления прошло, автор тоже читает реплику."""
+        url = self.create_post()
+        self.assertEqual(self.author_client.get(url).status_code, 404)
@@ -0,0 +1,46 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+TEMP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SOURCE = os.path.join(TEMP_ROOT, 'source')
+TARGET = os.path.join(TEMP_ROOT, 'collected')
+CSS = b'.post { margin: 0 auto; padding: 1rem; }\n' * 20
+
+
+@override_settings(
+    STATIC_ROOT=TARGET, STATICFILES_DIRS=[SOURCE],
+    STATICFILES_FINDERS=[
+        'django.contrib.staticfiles.finders.FileSystemFinder'
+    ],
+    STATICFILES_STORAGE=(
+        'core.staticfiles.CompressedManifestStaticFilesStorage'
+    ),
+)
+class CompressedManifestTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(SOURCE, 'css'))
+        with open(os.path.join(SOURCE, 'css', 'site.css'), 'wb') as file:
+            file.write(CSS)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_ROOT, ignore_errors=True)
+
+    def test_collectstatic_writes_compressed_copies(self):
+        """collectstatic кладёт файл с хешем, манифест и .gz рядом."""
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(TARGET, 'staticfiles.json')) as file:
+            hashed = json.load(file)['paths']['css/site.css']
+        self.assertRegex(hashed, r'^css/site\.[0-9a-f]{12}\.css$')
+        with gzip.open(os.path.join(TARGET, hashed + '.gz')) as file:
+            self.assertEqual(file.read(), CSS)
@@ -4,7 +4,12 @@ import sys
 
 
 def main():
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    # Тестам свои настройки, только для команды test, а не для любой
+    # команды с «test» в аргументах.
+    settings = 'yatube.test_settings' if sys.argv[1:2] == ['test'] else (
+        'yatube.settings'
+    )
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
@@ -1,10 +1,33 @@
 from django.contrib import admin
 
+from . import search
 from .models import Group, Post, Comment, Follow
 
+# Сколько самых новых совпадений показывает поиск в админке: id уходят
+# в запрос параметрами, а их число в SQLite ограничено.
+SEARCH_LIMIT = 500
+
+
+class IndexedSearchMixin:
+    """Поиск в списке по индексу основ слов вместо LIKE '%…%'.
+
+    search_fields остаются, чтобы админка показывала строку поиска.
+    Частая основа находит больше SEARCH_LIMIT записей — показываются
+    самые новые из них.
+    """
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        ids = sorted(
+            search.matching_ids(self.search_kind, search_term), reverse=True
+        )
+        return queryset.filter(pk__in=ids[:SEARCH_LIMIT]), False
+
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
         'pk',
         'text',
@@ -14,6 +37,7 @@ class PostAdmin(admin.ModelAdmin):
     )
     list_editable = ('group',)
     search_fields = ('text',)
+    search_kind = search.POST
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
@@ -31,10 +55,11 @@ class GroupAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('post', 'text', 'author', 'created')
     list_filter = ('created',)
     search_fields = ('text',)
+    search_kind = search.COMMENT
 
 
 @admin.register(Follow)
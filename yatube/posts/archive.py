@@ -0,0 +1,74 @@
+"""Перенос старых постов с комментариями в архивные таблицы.
+
+Посты удаляются из posts_post обычным delete(), поэтому сигналы сами
+убирают их из лент, счётчиков лент и поискового индекса. Число постов
+автора не меняется: оно складывается из posts_count и
+archived_posts_count. Ссылки на файлы картинок тоже сохраняются.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters
+from .models import ArchivedComment, ArchivedPost, Comment, Post, UserStats
+from .settings import ARCHIVE_AFTER_DAYS
+
+BATCH_SIZE = 500
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'updated', 'author_id', 'group_id', 'image',
+    'comments_count',
+)
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+def _move(ids):
+    """Переносит посты ids и их комментарии; число перенесённых строк."""
+    posts = Post.objects.filter(pk__in=ids)
+    ArchivedPost.objects.bulk_create(
+        ArchivedPost(**fields) for fields in posts.values(*POST_FIELDS)
+    )
+    comments = ArchivedComment.objects.bulk_create(
+        ArchivedComment(**fields)
+        for fields in Comment.objects.filter(
+            post_id__in=ids
+        ).values(*COMMENT_FIELDS)
+    )
+    authors = Counter(posts.values_list('author_id', flat=True))
+    images = Counter(posts.values_list('image', flat=True))
+    posts.delete()
+    for author_id, number in authors.items():
+        counters.shift(UserStats, author_id, number, 'archived_posts_count')
+    # Ссылку на файл картинки теперь держит архивный пост.
+    counters.shift_images(images)
+    return len(ids), len(comments)
+
+
+def archive(days=ARCHIVE_AFTER_DAYS, batch_size=BATCH_SIZE):
+    """Архивирует посты старше days дней пачками по batch_size,
+    каждую в своей транзакции; возвращает (постов, комментариев)."""
+    cutoff = timezone.now() - timedelta(days=days)
+    moved = Counter()
+    while True:
+        with transaction.atomic():
+            ids = list(Post.objects.filter(
+                pub_date__lt=cutoff
+            ).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            posts, comments = _move(ids)
+        moved.update(posts=posts, comments=comments)
+    return moved['posts'], moved['comments']
+
+
+def get_post(post_id):
+    """Пост для страницы поста: из posts_post, а если его там нет —
+    из архива; None, если поста нет нигде."""
+    for model in (Post, ArchivedPost):
+        post = model.objects.for_feed().prefetch_related(
+            'comments__author'
+        ).filter(pk=post_id).first()
+        if post is not None:
+            return post
+    return None
@@ -0,0 +1,167 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import (ArchivedPost, Comment, Follow, ImageBlob, Post,
+                     PostCounter, User, UserStats)
+
+ALL_KEY = 'posts'
+
+
+def group_key(group_id):
+    return f'group:{group_id}'
+
+
+def post_keys(post):
+    """Ключи лент со счётчиком в хранилище, в которые попадает пост.
+
+    Лент подписок среди них нет: их длина складывается из posts_count
+    авторов (см. follow_count), так что пост автора с сотнями тысяч
+    подписчиков двигает две строки, а не по строке на подписчика.
+    """
+    keys = [ALL_KEY]
+    if post.group_id:
+        keys.append(group_key(post.group_id))
+    return keys
+
+
+def follow_count(user_id):
+    """Число постов в ленте подписок: сумма posts_count авторов,
+    на которых подписан пользователь, — строка на подписку, а не
+    COUNT(*) по постам."""
+    return UserStats.objects.filter(
+        user__following__user_id=user_id
+    ).aggregate(total=Sum('posts_count'))['total'] or 0
+
+
+def get_count(key, queryset):
+    """Счётчик ленты; отсутствующий считается по queryset один раз."""
+    value = PostCounter.objects.filter(
+        key=key
+    ).values_list('value', flat=True).first()
+    if value is None:
+        value = PostCounter.objects.get_or_create(
+            key=key, defaults={'value': queryset.count()}
+        )[0].value
+    return value
+
+
+def user_stats(user):
+    """Счётчики пользователя; недостающая строка досчитывается на месте."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return UserStats.objects.get_or_create(user=user, defaults={
+            'posts_count': user.posts.count(),
+            'archived_posts_count': user.archived_posts.count(),
+            'followers_count': user.following.count(),
+            'following_count': user.follower.count(),
+        })[0]
+
+
+def forget(keys):
+    """Сбрасывает счётчики keys: они досчитаются при следующем чтении."""
+    PostCounter.objects.filter(key__in=keys).delete()
+
+
+def incr(keys, delta=1):
+    """Сдвигает уже заведённые счётчики, остальные досчитаются при чтении."""
+    if keys and delta:
+        PostCounter.objects.filter(
+            key__in=keys
+        ).update(value=F('value') + delta)
+
+
+def shift(model, pk, delta, *fields):
+    """Атомарно сдвигает поля-счётчики строки, не уходя ниже нуля."""
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0) for field in fields}
+    )
+
+
+def shift_images(deltas):
+    """Сдвигает число ссылок на файлы картинок: {имя: на сколько}."""
+    for name, delta in deltas.items():
+        if name and delta:
+            ImageBlob.objects.get_or_create(name=name)
+            shift(ImageBlob, name, delta, 'references')
+
+
+def rebuild():
+    """Пересчитывает все счётчики с нуля."""
+    counters = [PostCounter(key=ALL_KEY, value=Post.objects.count())]
+    for group_id, value in Post.objects.filter(
+        group__isnull=False
+    ).values_list('group').annotate(Count('pk')).order_by():
+        counters.append(PostCounter(key=group_key(group_id), value=value))
+    with transaction.atomic():
+        # follow: — счётчики лент подписок, которые больше не ведутся.
+        PostCounter.objects.filter(
+            Q(key=ALL_KEY) | Q(key__startswith='group:')
+            | Q(key__startswith='follow:')
+        ).delete()
+        PostCounter.objects.bulk_create(counters, batch_size=500)
+    return len(counters)
+
+
+def _count_of(queryset, field):
+    """Подзапрос COUNT(*) queryset по полю field, ссылающемуся на OuterRef."""
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def _user_counts():
+    return {
+        'posts_count': _count_of(Post.objects.all(), 'author'),
+        'archived_posts_count': _count_of(
+            ArchivedPost.objects.all(), 'author'
+        ),
+        'followers_count': _count_of(Follow.objects.all(), 'author'),
+        'following_count': _count_of(Follow.objects.all(), 'user'),
+    }
+
+
+def _comment_counts():
+    return {'comments_count': _count_of(Comment.objects.all(), 'post')}
+
+
+def reconcile_users(user_ids):
+    """Пересчитывает счётчики только пользователей user_ids."""
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=pk) for pk in user_ids], ignore_conflicts=True
+    )
+    UserStats.objects.filter(user_id__in=user_ids).update(**_user_counts())
+
+
+def reconcile_posts(post_ids):
+    """Пересчитывает число комментариев только постов post_ids."""
+    Post.objects.filter(pk__in=post_ids).update(**_comment_counts())
+
+
+def reconcile():
+    """Сверяет денормализованные счётчики с таблицами и чинит расхождения."""
+    with transaction.atomic():
+        UserStats.objects.bulk_create(
+            [UserStats(user_id=pk) for pk in User.objects.filter(
+                stats__isnull=True
+            ).values_list('pk', flat=True)],
+            ignore_conflicts=True,
+        )
+        UserStats.objects.update(**_user_counts())
+        Post.objects.update(**_comment_counts())
+        images = Post.objects.exclude(image='').values_list('image')
+        ImageBlob.objects.bulk_create(
+            [ImageBlob(name=name) for name, in images.order_by().union(
+                ArchivedPost.objects.exclude(image='').values_list(
+                    'image'
+                ).order_by()
+            )],
+            ignore_conflicts=True, batch_size=500,
+        )
+        ImageBlob.objects.update(
+            references=_count_of(Post.objects.all(), 'image')
+            + _count_of(ArchivedPost.objects.all(), 'image')
+        )
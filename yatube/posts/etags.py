@@ -0,0 +1,67 @@
+import hashlib
+
+from django.middleware.csrf import get_token
+
+from . import feed_cache
+from .models import ArchivedPost, Group, Post, User
+
+
+def _etag(request, *parts):
+    """Хеш частей валидатора.
+
+    В него входит и пользователь: шапка, кнопки подписки и правки
+    у каждого свои, и чужая страница не должна сойти за свежую.
+    """
+    raw = ':'.join(str(part) for part in (*parts, request.user.pk))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _feed_etag(request, feed, owner):
+    if owner is None:
+        return None
+    return _etag(request, feed_cache.page_key(request, feed, owner))
+
+
+def index_etag(request):
+    return _etag(request, feed_cache.page_key(request, feed_cache.INDEX))
+
+
+def group_etag(request, slug):
+    return _feed_etag(request, feed_cache.GROUP, Group.objects.filter(
+        slug=slug
+    ).values_list('pk', flat=True).first())
+
+
+def profile_etag(request, username):
+    return _feed_etag(request, feed_cache.PROFILE, User.objects.filter(
+        username=username
+    ).values_list('pk', flat=True).first())
+
+
+def _csrf_cookie(request):
+    """Значение CSRF-куки; get_token заводит её, если клиент пришёл
+    без куки, и тогда ответ поставит ровно это значение."""
+    get_token(request)
+    return request.META['CSRF_COOKIE']
+
+
+def post_etag(request, post_id):
+    """Правка поста, число комментариев и постов автора — одной строкой.
+
+    Поста нет среди свежих — ищем его в архиве. Версия страницы поста
+    меняется, когда готовы варианты его картинки. В форме комментария
+    зашит CSRF-токен, поэтому в валидатор входит и кука с ним: после
+    нового входа токен другой, и старая страница не должна получить 304.
+    """
+    for model in (Post, ArchivedPost):
+        row = model.objects.filter(pk=post_id).values_list(
+            'updated', 'comments_count', 'author__stats__posts_count',
+            'author__stats__archived_posts_count',
+        ).first()
+        if row is not None:
+            return _etag(
+                request, model.archived, *row,
+                feed_cache.versions((feed_cache.POST, post_id)),
+                _csrf_cookie(request),
+            )
+    return None
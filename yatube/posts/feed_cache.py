@@ -0,0 +1,83 @@
+import time
+
+from django.core.cache import cache
+
+from core.routers import use_primary
+
+from . import paginators
+from .settings import FEED_CACHE_TTL
+
+INDEX = 'index'
+FOLLOW = 'follow'
+AUTHOR = 'author'
+GROUP = 'group'
+PROFILE = 'profile'
+# Не лента, а страница одного поста: её версию поднимает нарезка
+# картинки, которая меняет разметку, но не сам пост.
+POST = 'post'
+
+
+def _version_key(feed, owner=None):
+    return f'feed-version:{feed}:{owner or "-"}'
+
+
+def _new_version():
+    # Время в наносекундах не совпадёт ни с одной прежней версией, даже если
+    # счётчик версии вытеснили из кеша.
+    return time.time_ns()
+
+
+def versions(*feeds):
+    """Текущие версии лент; feeds — пары (тип ленты, владелец)."""
+    keys = [_version_key(*feed) for feed in feeds]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _new_version(), None)
+            found[key] = cache.get(key)
+    return '.'.join(str(found[key]) for key in keys)
+
+
+def bump(*feeds):
+    """Инвалидирует ленты, поднимая их версии."""
+    for feed in feeds:
+        key = _version_key(*feed)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+
+
+def page_key(request, feed, owner=None, extra=()):
+    """Ключ страницы ленты: тип, владелец, курсор и версии.
+
+    Сигналы Post и Follow поднимают версии затронутых лент, и старые
+    страницы просто перестают читаться, поэтому TTL может быть долгим.
+    extra — ленты, от версий которых страница тоже зависит, например
+    авторы-знаменитости в ленте подписок.
+
+    Курсоры входят в ключ разобранными: битый ?after= не заводит
+    отдельную копию первой страницы.
+    """
+    version = versions((feed, owner), *extra)
+    after = paginators.canonical_cursor(request.GET.get('after'))
+    before = paginators.canonical_cursor(request.GET.get('before'))
+    return f'{feed}:{owner or "-"}:{version}:{after}:{before}'
+
+
+def get_page(paginator, key, after=None, before=None):
+    """Страница CursorPaginator из кеша или из базы с записью в кеш.
+
+    Через get_or_set, чтобы бэкенд с защитой от «стада» пересчитывал
+    горячую страницу одним воркером. Страница читается из основной базы:
+    собранная из отставшей реплики, она попала бы в кеш под новой версией
+    и жила бы там до следующей правки.
+    """
+    def build():
+        with use_primary():
+            page = paginator.get_page(after, before)
+        return list(page.object_list), page.next_cursor, page.previous_cursor
+
+    return paginator.make_page(
+        *cache.get_or_set(f'feed-page:{key}', build, FEED_CACHE_TTL)
+    )
@@ -0,0 +1,191 @@
+from collections import defaultdict
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import (Celebrity, FeedEntry, Follow, Post, PostCounter,
+                     UserStats)
+from .settings import CELEBRITY_MIN_FOLLOWERS, CELEBRITY_PERCENTILE
+
+BATCH_SIZE = 500
+THRESHOLD_KEY = 'celebrity_threshold'
+
+
+def _entries(user_id, posts):
+    return (
+        FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in posts
+    )
+
+
+def _bulk_create(entries):
+    entries = iter(entries)
+    batch = list(islice(entries, BATCH_SIZE))
+    while batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        batch = list(islice(entries, BATCH_SIZE))
+
+
+def is_celebrity(author_id):
+    return Celebrity.objects.filter(author_id=author_id).exists()
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам всех подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_create(
+        FeedEntry(user_id=user_id, post_id=post.pk, pub_date=post.pub_date)
+        for user_id in followers.iterator()
+    )
+
+
+def followers_of(author_ids):
+    """{автор: [id подписчиков]} для авторов author_ids одним запросом."""
+    followers = defaultdict(list)
+    for author_id, user_id in Follow.objects.filter(
+        author_id__in=author_ids
+    ).values_list('author_id', 'user_id').iterator():
+        followers[author_id].append(user_id)
+    return followers
+
+
+def fan_out_many(posts, followers):
+    """Раскладывает пачку постов: posts — тройки (id, автор, дата),
+    followers — результат followers_of. Посты знаменитостей пропускаются.
+    """
+    celebrities = set(Celebrity.objects.filter(
+        author_id__in=followers
+    ).values_list('author_id', flat=True))
+    _bulk_create(
+        FeedEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+        for pk, author_id, pub_date in posts
+        if author_id not in celebrities
+        for user_id in followers.get(author_id, ())
+    )
+
+
+def backfill(follow):
+    """Добавляет в ленту нового подписчика все посты автора."""
+    if is_celebrity(follow.author_id):
+        return
+    posts = Post.objects.filter(
+        author_id=follow.author_id
+    ).values_list('pk', 'pub_date')
+    _bulk_create(_entries(follow.user_id, posts.iterator()))
+
+
+def prune(follow):
+    """Убирает посты автора из ленты отписавшегося."""
+    FeedEntry.objects.filter(
+        user_id=follow.user_id, post__author_id=follow.author_id
+    ).delete()
+
+
+def feed_posts(user):
+    """Посты ленты подписок: range scan по индексу (user, pub_date).
+
+    Дата берётся из FeedEntry через аннотацию, чтобы seek-фильтр
+    пагинатора шёл по тому же join, а не заводил новый.
+    """
+    return Post.objects.for_feed().filter(feed_entries__user=user).annotate(
+        feed_pub_date=F('feed_entries__pub_date')
+    )
+
+
+def followed_celebrities(user):
+    return list(Celebrity.objects.filter(
+        author__following__user=user
+    ).values_list('author_id', flat=True))
+
+
+def feed_streams(user, celebrities):
+    """Потоки для слияния: разложенная лента и посты каждой знаменитости."""
+    streams = [(feed_posts(user), ('feed_pub_date', 'pk'))]
+    for author_id in celebrities:
+        streams.append(
+            (
+                Post.objects.for_feed().filter(author_id=author_id),
+                ('pub_date', 'pk'),
+            )
+        )
+    return streams
+
+
+def threshold():
+    """Порог подписчиков, с которого автор считается знаменитостью."""
+    value = PostCounter.objects.filter(
+        key=THRESHOLD_KEY
+    ).values_list('value', flat=True).first()
+    return value or CELEBRITY_MIN_FOLLOWERS
+
+
+def promote(author_id):
+    """Переводит автора на подмешивание при чтении."""
+    with transaction.atomic():
+        Celebrity.objects.get_or_create(author_id=author_id)
+        FeedEntry.objects.filter(post__author_id=author_id).delete()
+
+
+def demote(author_id):
+    """Возвращает автора к раскладке постов по лентам подписчиков."""
+    with transaction.atomic():
+        Celebrity.objects.filter(author_id=author_id).delete()
+        for follow in Follow.objects.filter(author_id=author_id).iterator():
+            backfill(follow)
+
+
+def check_author(author_id):
+    """Продвигает автора сразу, как только он перешёл порог."""
+    followers = UserStats.objects.filter(
+        user_id=author_id
+    ).values_list('followers_count', flat=True).first() or 0
+    if followers >= threshold() and not is_celebrity(author_id):
+        promote(author_id)
+
+
+def review():
+    """Пересматривает порог и состав знаменитостей по числу подписчиков.
+
+    Понижение делается только здесь, чтобы автор на границе порога
+    не переключался туда-обратно при каждой подписке. Пересмотр читает
+    статистику всех авторов и может разложить все посты понижённого
+    по лентам, поэтому в запросах пользователей он не запускается:
+    его по расписанию зовёт команда review_celebrities.
+    """
+    stats = dict(UserStats.objects.filter(
+        followers_count__gt=0
+    ).values_list('user_id', 'followers_count'))
+    counts = sorted(stats.values())
+    percentile = 0
+    if counts:
+        percentile = counts[
+            min(len(counts) - 1, int(len(counts) * CELEBRITY_PERCENTILE))
+        ]
+    value = max(CELEBRITY_MIN_FOLLOWERS, percentile)
+    PostCounter.objects.update_or_create(
+        key=THRESHOLD_KEY, defaults={'value': value}
+    )
+    celebrities = {
+        author_id for author_id, followers in stats.items()
+        if followers >= value
+    }
+    current = set(Celebrity.objects.values_list('author_id', flat=True))
+    for author_id in celebrities - current:
+        promote(author_id)
+    for author_id in current - celebrities:
+        demote(author_id)
+    return value, celebrities
+
+
+def rebuild():
+    """Пересобирает таблицу лент подписок с нуля."""
+    with transaction.atomic():
+        FeedEntry.objects.all().delete()
+        for follow in Follow.objects.all().iterator():
+            backfill(follow)
+    return FeedEntry.objects.count()
@@ -1,8 +1,10 @@
 from django import forms
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm
 
 from .models import Comment, Post
+from .uploads import too_large, validate_image
 
 User = get_user_model()
 
@@ -20,6 +22,19 @@ class PostForm(ModelForm):
             'image': 'Картинка для поста'
         }
 
+    def __init__(self, *args, rejected_uploads=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rejected_uploads = rejected_uploads or {}
+
+    def clean_image(self):
+        if 'image' in self.rejected_uploads:
+            raise too_large()
+        image = self.cleaned_data['image']
+        # Уже сохранённую картинку при редактировании не перепроверяем.
+        if isinstance(image, UploadedFile):
+            validate_image(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,308 @@
+"""Массовый импорт постов, комментариев и подписок из JSONL или CSV.
+
+Каждая запись — объект с полем type:
+
+* post: id, author, group, text, pub_date;
+* comment: id, post, author, text, created;
+* follow: user, author.
+
+Авторы и подписчики — имена пользователей, группа — slug, post — id поста.
+id постов и комментариев сохраняются, поэтому повторный импорт тех же
+записей ничего не задваивает; пост, который уже лежит в архиве, тоже
+пропускается. В CSV те же поля — колонки, пустая ячейка
+значит «нет значения».
+
+Файл читается потоком и пишется пачками через bulk_create, каждая пачка
+в своей транзакции, так что память не растёт с размером файла. После
+пачки в файл контрольной точки пишется число обработанных записей,
+и прерванный импорт продолжается с неё.
+
+bulk_create не шлёт сигналов, поэтому счётчики, ленты подписок и поисковый
+индекс обновляются в транзакции каждой пачки и только для её записей:
+см. repair().
+"""
+import csv
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, feed_cache, feeds, search
+from .models import ArchivedPost, Comment, Follow, Group, Post, User
+
+POST = 'post'
+COMMENT = 'comment'
+FOLLOW = 'follow'
+KINDS = (POST, COMMENT, FOLLOW)
+JSONL = 'jsonl'
+CSV = 'csv'
+BATCH_SIZE = 500
+# Поля с auto_now и auto_now_add: при импорте в них пишутся даты из файла.
+DATE_FIELDS = ((Post, 'pub_date'), (Post, 'updated'), (Comment, 'created'))
+
+
+def read_records(stream, file_format=JSONL):
+    """Записи файла по одной, без чтения его целиком в память."""
+    if file_format == CSV:
+        for row in csv.DictReader(stream):
+            yield {key: value for key, value in row.items() if value}
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_checkpoint(path, source):
+    """Сколько записей source уже импортировано по файлу контрольной точки."""
+    if not os.path.exists(path):
+        return 0
+    with open(path) as file:
+        checkpoint = json.load(file)
+    if checkpoint['source'] != os.path.abspath(source):
+        raise ValueError(
+            f'Контрольная точка {path} относится к {checkpoint["source"]}'
+        )
+    return checkpoint['done']
+
+
+def write_checkpoint(path, source, done):
+    # Через временный файл: оборвавшаяся запись не испортит прежнюю точку.
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump({'source': os.path.abspath(source), 'done': done}, file)
+    os.replace(temporary, path)
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f'Неверная дата: {value}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+@contextmanager
+def keep_dates():
+    """Выключает auto_now и auto_now_add, чтобы сохранились даты из файла."""
+    fields = [model._meta.get_field(name) for model, name in DATE_FIELDS]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Importer:
+    """Пишет записи пачками; stats — сколько записей каждого типа
+    записано и сколько пропущено (неизвестный тип, автор, группа, пост).
+
+    Без repair счётчики, ленты и индекс не трогаются: их потом
+    пересобирают rebuild_counters, rebuild_feeds и rebuild_search_index.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, create_users=False,
+                 repair=True):
+        self.batch_size = batch_size
+        self.create_users = create_users
+        self.repair = repair
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.stats = Counter()
+        self.done = 0
+
+    def run(self, records, start=0, checkpoint=None, progress=None):
+        """Импортирует records, пропустив первые start.
+
+        checkpoint(done) и progress(done, записей в секунду) вызываются
+        после каждой закоммиченной пачки.
+        """
+        records = islice(records, start, None)
+        self.done = start
+        began = time.monotonic()
+        with keep_dates():
+            batch = list(islice(records, self.batch_size))
+            while batch:
+                with transaction.atomic():
+                    self.write(batch)
+                self.done += len(batch)
+                if checkpoint:
+                    checkpoint(self.done)
+                if progress:
+                    elapsed = max(time.monotonic() - began, 1e-6)
+                    progress(self.done, (self.done - start) / elapsed)
+                batch = list(islice(records, self.batch_size))
+        return self.stats
+
+    def write(self, batch):
+        rows = defaultdict(list)
+        for record in batch:
+            rows[record.get('type')].append(record)
+        if self.create_users:
+            self.add_users(rows)
+        archived = set(ArchivedPost.objects.filter(pk__in={
+            int(record['id']) for record in rows[POST] if record.get('id')
+        }).values_list('pk', flat=True))
+        new_posts = self.save(
+            Post, rows[POST], lambda record: self.post(record, archived)
+        )
+        posts = set(Post.objects.filter(pk__in={
+            int(record['post']) for record in rows[COMMENT]
+            if record.get('post')
+        }).values_list('pk', flat=True))
+        new_comments = self.save(
+            Comment, rows[COMMENT], lambda record: self.comment(record, posts)
+        )
+        new_follows = self.save(Follow, rows[FOLLOW], self.follow)
+        self.stats['skipped'] += len(batch) - sum(
+            len(rows[kind]) for kind in KINDS
+        )
+        if self.repair:
+            repair(new_posts, new_comments, new_follows)
+
+    def save(self, model, records, build):
+        """Пишет записи и возвращает запрос строк, которых до пачки не было:
+        с новыми id из файла или с id больше прежнего наибольшего."""
+        objects = [obj for obj in map(build, records) if obj is not None]
+        ids = {obj.pk for obj in objects if obj.pk is not None}
+        known = set(model.objects.filter(
+            pk__in=ids
+        ).values_list('pk', flat=True))
+        last = model.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        model.objects.bulk_create(objects, ignore_conflicts=True)
+        self.stats[model._meta.model_name] += len(objects)
+        self.stats['skipped'] += len(records) - len(objects)
+        return model.objects.filter(Q(pk__in=ids - known) | Q(pk__gt=last))
+
+    def add_users(self, rows):
+        """Заводит неизвестных авторов и подписчиков без пароля."""
+        names = {
+            record.get(field)
+            for kind, fields in (
+                (POST, ('author',)), (COMMENT, ('author',)),
+                (FOLLOW, ('user', 'author')),
+            )
+            for record in rows[kind] for field in fields
+        } - self.users.keys() - {None}
+        if not names:
+            return
+        User.objects.bulk_create(
+            [User(username=name, password=make_password(None))
+             for name in names],
+            ignore_conflicts=True,
+        )
+        self.users.update(User.objects.filter(
+            username__in=names
+        ).values_list('username', 'pk'))
+
+    def post(self, record, archived):
+        author = self.users.get(record.get('author'))
+        group = record.get('group')
+        if author is None or group and group not in self.groups or int(
+            record.get('id') or 0
+        ) in archived:
+            return None
+        pub_date = parse_date(record.get('pub_date'))
+        return Post(
+            pk=record.get('id'), text=record.get('text', ''),
+            author_id=author, group_id=self.groups.get(group),
+            pub_date=pub_date, updated=pub_date,
+        )
+
+    def comment(self, record, posts):
+        author = self.users.get(record.get('author'))
+        post = int(record.get('post') or 0)
+        if author is None or post not in posts:
+            return None
+        return Comment(
+            pk=record.get('id'), post_id=post, author_id=author,
+            text=record.get('text', ''),
+            created=parse_date(record.get('created')),
+        )
+
+    def follow(self, record):
+        user = self.users.get(record.get('user'))
+        author = self.users.get(record.get('author'))
+        if user is None or author is None or user == author:
+            return None
+        return Follow(user_id=user, author_id=author)
+
+
+def _index(posts, comments):
+    search.update(search.POST, [
+        (pk, '', search.post_document(text, title, description))
+        for pk, _, _, _, text, title, description in posts
+    ])
+    search.update(
+        search.COMMENT, [(pk, '', text) for pk, _, text in comments]
+    )
+
+
+def _invalidate(authors, groups, followers, follows):
+    """Сбрасывает счётчики лент и поднимает версии лент, которые задела
+    пачка; followers — подписчики авторов её постов."""
+    readers = {user for users in followers.values() for user in users}
+    readers.update(user for user, _ in follows)
+    keys = [counters.group_key(group) for group in groups]
+    stale = [(feed_cache.GROUP, group) for group in groups]
+    stale += [(feed_cache.FOLLOW, user) for user in readers]
+    if authors:
+        keys.append(counters.ALL_KEY)
+        stale.append((feed_cache.INDEX, None))
+    counters.forget(keys)
+    feed_cache.bump(
+        *stale,
+        *((feed_cache.AUTHOR, author) for author in authors),
+        *((feed_cache.PROFILE, user) for user in authors.union(
+            *follows
+        )),
+    )
+
+
+def repair(posts, comments, follows):
+    """Обновляет для пачки то, что обычно поддерживают сигналы.
+
+    posts, comments и follows — запросы только что записанных строк,
+    так что работа растёт с пачкой и числом подписчиков её авторов,
+    а не с объёмом базы. Порог знаменитостей авторов новых подписок
+    проверяется раньше раскладки, чтобы посты новых знаменитостей
+    не легли в ленты подписчиков; понижение остаётся за feeds.review().
+    """
+    posts = list(posts.values_list(
+        'pk', 'author_id', 'group_id', 'pub_date', 'text', 'group__title',
+        'group__description',
+    ))
+    comments = list(comments.values_list('pk', 'post_id', 'text'))
+    follows = list(follows.values_list('user_id', 'author_id'))
+    _index(posts, comments)
+    authors = {author for _, author, *_ in posts}
+    counters.reconcile_users(authors.union(*follows))
+    counters.reconcile_posts({post for _, post, _ in comments})
+    for author in {author for _, author in follows}:
+        feeds.check_author(author)
+    followers = feeds.followers_of(authors)
+    feeds.fan_out_many(
+        [(pk, author, pub_date) for pk, author, _, pub_date, *_ in posts],
+        followers,
+    )
+    for user, author in follows:
+        feeds.backfill(Follow(user_id=user, author_id=author))
+    _invalidate(
+        authors, {group for _, _, group, *_ in posts if group},
+        followers, follows,
+    )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts import archive
+from posts.settings import ARCHIVE_AFTER_DAYS
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты старше --days дней вместе с комментариями '
+        'в архивные таблицы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS)
+        parser.add_argument(
+            '--batch-size', type=int, default=archive.BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        posts, comments = archive.archive(
+            options['days'], options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'В архив перенесено постов: {posts}, комментариев: {comments}'
+        ))
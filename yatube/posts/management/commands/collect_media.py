@@ -0,0 +1,40 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from posts import media_gc
+
+
+class Command(BaseCommand):
+    help = (
+        'Находит картинки постов и миниатюры sorl, на которые никто не '
+        'ссылается, и удаляет их вместе с устаревшими записями kvstore.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать файлы, ничего не удаляя.',
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=media_gc.MIN_AGE,
+            help='Не трогать файлы моложе стольких секунд.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=media_gc.BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        found = Counter()
+        for kind, name in media_gc.collect(
+            not dry_run, options['batch_size'], options['min_age']
+        ):
+            found[kind] += 1
+            if options['verbosity'] > 1 or dry_run:
+                self.stdout.write(name)
+        action = 'Найдено' if dry_run else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} картинок: {found[media_gc.IMAGE]}, '
+            f'миниатюр: {found[media_gc.THUMBNAIL]}'
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts import query_plans
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает планы горячих запросов постов, комментариев и подписок '
+        'до и после составных индексов (только SQLite).'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Сравнение планов есть только для SQLite.')
+        for name, before, after, column in query_plans.compare():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label, plan in (('до', before), ('после', after)):
+                style = (
+                    self.style.SUCCESS
+                    if query_plans.is_range_scan(plan, column)
+                    else self.style.WARNING
+                )
+                self.stdout.write(style(f'  {label}: ' + '; '.join(plan)))
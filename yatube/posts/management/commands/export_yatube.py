@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import exporter, importer
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты и комментарии в JSONL или CSV потоком, '
+        'не загружая их в память. Выгрузку читает import_yatube.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=(importer.JSONL, importer.CSV),
+            default=importer.JSONL,
+        )
+        parser.add_argument(
+            '--type', dest='kinds', action='append', choices=exporter.KINDS,
+            help='Что выгружать; по умолчанию посты и комментарии.',
+        )
+        parser.add_argument('--author', help='Имя пользователя.')
+        parser.add_argument('--group', help='slug группы.')
+        parser.add_argument('--since', help='С даты ГГГГ-ММ-ДД.')
+        parser.add_argument('--until', help='По дату ГГГГ-ММ-ДД.')
+        parser.add_argument(
+            '--output', help='Файл выгрузки; по умолчанию stdout.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            records = exporter.records(
+                options['kinds'] or exporter.KINDS, options['author'],
+                options['group'], options['since'], options['until'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        lines = exporter.render(records, options['format'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(
+            options['output'], 'w', newline='', encoding='utf-8'
+        ) as file:
+            file.writelines(lines)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import ArchivedPost, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Режет недостающие варианты всех картинок постов, например '
+        'после смены IMAGE_WIDTHS или переноса хранилища.'
+    )
+
+    def handle(self, *args, **options):
+        total = 0
+        for model in (Post, ArchivedPost):
+            names = model.objects.exclude(image='').order_by().values_list(
+                'image', flat=True
+            ).distinct()
+            for name in names.iterator():
+                thumbnails.generate(name)
+                total += 1
+        self.stdout.write(self.style.SUCCESS(f'Картинок: {total}'))
@@ -0,0 +1,85 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import importer
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты, комментарии и подписки из JSONL или CSV '
+        'пачками через bulk_create и в каждой пачке обновляет счётчики, '
+        'ленты и поисковый индекс. Формат записей описан '
+        'в posts/importer.py.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format', choices=(importer.JSONL, importer.CSV),
+            help='По умолчанию — по расширению файла.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=importer.BATCH_SIZE
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки: с него импорт продолжается '
+                 'после обрыва, после успешного импорта он удаляется.',
+        )
+        parser.add_argument(
+            '--create-users', action='store_true',
+            help='Заводить неизвестных пользователей без пароля.',
+        )
+        parser.add_argument(
+            '--no-repair', action='store_true',
+            help='Не обновлять счётчики, ленты и индекс; потом их '
+                 'пересобирают rebuild_counters, rebuild_feeds '
+                 'и rebuild_search_index.',
+        )
+
+    def handle(self, *args, **options):
+        path, checkpoint = options['path'], options['checkpoint']
+        file_format = options['format'] or (
+            importer.CSV if path.endswith('.csv') else importer.JSONL
+        )
+        start = self.start(checkpoint, path)
+        job = importer.Importer(
+            options['batch_size'], options['create_users'],
+            not options['no_repair'],
+        )
+
+        def save_checkpoint(done):
+            if checkpoint:
+                importer.write_checkpoint(checkpoint, path, done)
+
+        with open(path, newline='', encoding='utf-8') as stream:
+            try:
+                stats = job.run(
+                    importer.read_records(stream, file_format), start,
+                    save_checkpoint, self.progress,
+                )
+            except ValueError as error:
+                raise CommandError(
+                    f'Импорт остановлен после записи {job.done}: {error}'
+                )
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f'Постов: {stats["post"]}, комментариев: {stats["comment"]}, '
+            f'подписок: {stats["follow"]}, пропущено: {stats["skipped"]}'
+        ))
+
+    def start(self, checkpoint, path):
+        if not checkpoint:
+            return 0
+        try:
+            start = importer.read_checkpoint(checkpoint, path)
+        except ValueError as error:
+            raise CommandError(error)
+        if start:
+            self.stdout.write(f'Продолжаем с записи {start}')
+        return start
+
+    def progress(self, done, rate):
+        self.stdout.write(f'{done} записей, {rate:.0f} записей/с')
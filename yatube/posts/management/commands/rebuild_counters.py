@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики постов лент с нуля и сверяет '
+        'счётчики пользователей и комментариев с таблицами.'
+    )
+
+    def handle(self, *args, **options):
+        counters.reconcile()
+        total = counters.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано счётчиков: {total}'
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import feeds
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок (FeedEntry) по текущим подпискам.'
+
+    def handle(self, *args, **options):
+        total = feeds.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах: {total}'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает поисковый индекс постов и комментариев, например '
+        'после bulk_create или update(), которые обходят сигналы.'
+    )
+
+    def handle(self, *args, **options):
+        total = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Основ в индексе: {total}'))
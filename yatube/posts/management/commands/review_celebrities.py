@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import feeds
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересматривает порог знаменитостей по статистике подписок '
+        'и переводит авторов между раскладкой и подмешиванием постов. '
+        'Запускается по расписанию, например cron раз в час: подписки '
+        'сами только продвигают автора, перешедшего порог.'
+    )
+
+    def handle(self, *args, **options):
+        threshold, celebrities = feeds.review()
+        self.stdout.write(self.style.SUCCESS(
+            f'Порог: {threshold}, знаменитостей: {len(celebrities)}'
+        ))
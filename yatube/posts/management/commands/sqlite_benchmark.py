@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts import sqlite_bench
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite без настройки и с '
+        'SQLITE_PRAGMAS на смеси создания постов, комментариев и чтения '
+        'главной. Работает на временной копии базы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Бенчмарк есть только для SQLite.')
+        results = {}
+        for label, pragmas in (
+            ('без настройки', sqlite_bench.BASELINE_PRAGMAS),
+            ('SQLITE_PRAGMAS', settings.SQLITE_PRAGMAS),
+        ):
+            totals = sqlite_bench.run(
+                pragmas, options['writers'], options['readers'],
+                options['seconds'],
+            )
+            results[label] = totals
+            seconds = totals['seconds']
+            self.stdout.write(
+                f'{label}: записей {totals["writes"] / seconds:.0f}/с, '
+                f'чтений {totals["reads"] / seconds:.0f}/с, '
+                f'ошибок блокировки {totals["errors"]}'
+            )
+        before, after = results.values()
+        total = sum(after[kind] for kind in ('writes', 'reads'))
+        baseline = sum(before[kind] for kind in ('writes', 'reads')) or 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Операций в секунду: x{total / baseline:.2f}'
+        ))
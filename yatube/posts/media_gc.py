@@ -0,0 +1,106 @@
+"""Поиск и удаление картинок постов, на которые никто не ссылается.
+
+Картинки остаются на диске, когда пост получает новую картинку или
+удаляется, в том числе каскадом вместе с автором. Каталог читается
+потоком, а имена сверяются с базой пачками через IN, так что память
+не зависит от числа файлов. Миниатюры sorl проверяются так же: живая
+миниатюра — та, на которую есть запись в kvstore. Картинки удаляет их
+хранилище (см. posts.storage), а оно не тронет файл, на который ещё
+ссылается пост.
+"""
+import os
+import time
+from itertools import islice
+
+from django.conf import settings
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+from .models import ArchivedPost, Post
+
+IMAGE = 'image'
+THUMBNAIL = 'thumbnail'
+BATCH_SIZE = 500
+# Файл, только что загруженный формой, появляется на диске раньше, чем
+# строка поста в базе: свежие файлы не трогаем.
+MIN_AGE = 60 * 60
+
+
+def _files(directory, min_age):
+    """Имена файлов каталога MEDIA_ROOT/directory старше min_age секунд,
+    относительно MEDIA_ROOT."""
+    root = settings.MEDIA_ROOT
+    stack = [os.path.join(root, directory)]
+    deadline = time.time() - min_age
+    while stack:
+        path = stack.pop()
+        if not os.path.isdir(path):
+            continue
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.stat(follow_symlinks=False).st_mtime < deadline:
+                    name = os.path.relpath(entry.path, root)
+                    yield name.replace(os.sep, '/')
+
+
+def _referenced_images(names):
+    found = set()
+    for model in (Post, ArchivedPost):
+        found.update(model.objects.filter(
+            image__in=names
+        ).values_list('image', flat=True))
+    return found
+
+
+def _referenced_thumbnails(names):
+    keys = {
+        add_prefix(ImageFile(name, default.storage).key): name
+        for name in names
+    }
+    return {
+        keys[key] for key in KVStore.objects.filter(
+            key__in=keys
+        ).values_list('key', flat=True)
+    }
+
+
+def _orphans(directory, referenced, batch_size, min_age):
+    files = _files(directory, min_age)
+    batch = list(islice(files, batch_size))
+    while batch:
+        found = referenced(batch)
+        for name in batch:
+            if name not in found:
+                yield name
+        batch = list(islice(files, batch_size))
+
+
+def collect(delete=False, batch_size=BATCH_SIZE, min_age=MIN_AGE):
+    """Пары (IMAGE или THUMBNAIL, имя) для всех осиротевших файлов.
+
+    С delete файлы удаляются; у картинки — вместе с её миниатюрами
+    и записями kvstore, а в конце kvstore чистится от записей
+    о пропавших файлах.
+    """
+    field = Post._meta.get_field('image')
+    for name in _orphans(
+        field.upload_to, _referenced_images, batch_size, min_age
+    ):
+        if delete:
+            default.kvstore.delete(ImageFile(name, field.storage))
+            field.storage.delete(name)
+        yield IMAGE, name
+    for name in _orphans(
+        thumbnail_settings.THUMBNAIL_PREFIX, _referenced_thumbnails,
+        batch_size, min_age,
+    ):
+        if delete:
+            default.storage.delete(name)
+        yield THUMBNAIL, name
+    if delete:
+        default.kvstore.cleanup()
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Полнотекстовые индексы FTS5 постов (с группой) и комментариев.
+
+    Триггеры и наполнение — в posts.search.install после migrate: SQLite
+    пересоздаёт таблицу при изменении полей и теряет её триггеры.
+    """
+
+    dependencies = [
+        ('posts', '0024_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [
+                "CREATE VIRTUAL TABLE posts_post_fts USING fts5("
+                "text, group_title, group_description, "
+                "tokenize = 'unicode61 remove_diacritics 2')",
+                "CREATE VIRTUAL TABLE posts_comment_fts USING fts5("
+                "text, tokenize = 'unicode61 remove_diacritics 2')",
+            ],
+            [
+                f'DROP TRIGGER IF EXISTS {name}' for name in (
+                    'posts_post_fts_insert', 'posts_post_fts_update',
+                    'posts_post_fts_delete', 'posts_group_fts_update',
+                    'posts_comment_fts_insert', 'posts_comment_fts_update',
+                    'posts_comment_fts_delete',
+                )
+            ] + [
+                'DROP TABLE posts_post_fts',
+                'DROP TABLE posts_comment_fts',
+            ],
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:03
+
+from django.db import migrations, models
+
+FTS_TRIGGERS = (
+    'posts_post_fts_insert', 'posts_post_fts_update', 'posts_post_fts_delete',
+    'posts_group_fts_update', 'posts_comment_fts_insert',
+    'posts_comment_fts_update', 'posts_comment_fts_delete',
+)
+
+
+def fill_index(apps, schema_editor):
+    from posts.search import build, post_document
+
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    documents = {
+        'post': (
+            (pk, post_document(text, title))
+            for pk, text, title in Post.objects.values_list(
+                'pk', 'text', 'group__title'
+            ).iterator()
+        ),
+        'comment': Comment.objects.values_list('pk', 'text').iterator(),
+    }
+    for kind, rows in documents.items():
+        SearchTerm.objects.bulk_create(
+            [
+                SearchTerm(kind=kind, term=term, postings=postings)
+                for term, postings in build(rows).items()
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0025_search_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [f'DROP TRIGGER IF EXISTS {name}' for name in FTS_TRIGGERS] + [
+                'DROP TABLE posts_post_fts',
+                'DROP TABLE posts_comment_fts',
+            ],
+            [
+                "CREATE VIRTUAL TABLE posts_post_fts USING fts5("
+                "text, group_title, group_description, "
+                "tokenize = 'unicode61 remove_diacritics 2')",
+                "CREATE VIRTUAL TABLE posts_comment_fts USING fts5("
+                "text, tokenize = 'unicode61 remove_diacritics 2')",
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=16, verbose_name='Что ищем')),
+                ('term', models.CharField(max_length=64, verbose_name='Основа слова')),
+                ('postings', models.BinaryField(verbose_name='Документы')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchterm',
+            constraint=models.UniqueConstraint(fields=('kind', 'term'), name='unique_search_term'),
+        ),
+        migrations.RunPython(fill_index, migrations.RunPython.noop),
+    ]
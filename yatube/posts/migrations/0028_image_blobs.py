@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:23
+
+from collections import Counter
+
+from django.db import migrations, models
+import posts.storage
+
+
+def fill_blobs(apps, schema_editor):
+    ImageBlob = apps.get_model('posts', 'ImageBlob')
+    references = Counter()
+    for name in ('Post', 'ArchivedPost'):
+        references.update(
+            apps.get_model('posts', name).objects.exclude(
+                image=''
+            ).values_list('image', flat=True).iterator()
+        )
+    ImageBlob.objects.bulk_create(
+        [ImageBlob(name=name, references=number)
+         for name, number in references.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0027_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Имя файла')),
+                ('references', models.PositiveIntegerField(default=0, verbose_name='Ссылок')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='archivedpost',
+            name='image',
+            field=models.ImageField(blank=True, storage=posts.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=posts.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка'),
+        ),
+        migrations.RunPython(fill_blobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+def reindex_posts(apps, schema_editor):
+    from posts.search import build, post_document
+
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    SearchTerm.objects.filter(kind='post').delete()
+    SearchTerm.objects.bulk_create(
+        [
+            SearchTerm(kind='post', term=term, postings=postings)
+            for term, postings in build(
+                (pk, post_document(text, title, description))
+                for pk, text, title, description in Post.objects.values_list(
+                    'pk', 'text', 'group__title', 'group__description'
+                ).iterator()
+            ).items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0028_image_blobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex_posts, migrations.RunPython.noop),
+    ]
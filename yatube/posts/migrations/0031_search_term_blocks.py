@@ -0,0 +1,61 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:04
+
+from django.db import migrations, models
+
+
+def split_postings(apps, schema_editor):
+    from posts.search import blocks, post_document
+
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    documents = {
+        'post': (
+            (pk, post_document(text, title, description))
+            for pk, text, title, description in Post.objects.values_list(
+                'pk', 'text', 'group__title', 'group__description'
+            ).iterator()
+        ),
+        'comment': Comment.objects.values_list('pk', 'text').iterator(),
+    }
+    SearchTerm.objects.all().delete()
+    for kind, rows in documents.items():
+        SearchTerm.objects.bulk_create(
+            [
+                SearchTerm(
+                    kind=kind, term=term, block=block, postings=postings,
+                    documents=count,
+                )
+                for term, block, postings, count in blocks(rows)
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0030_post_pub_date_index'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='searchterm',
+            name='unique_search_term',
+        ),
+        migrations.AddField(
+            model_name='searchterm',
+            name='block',
+            field=models.PositiveIntegerField(default=0, verbose_name='Блок id'),
+        ),
+        migrations.AddField(
+            model_name='searchterm',
+            name='documents',
+            field=models.PositiveIntegerField(default=0, verbose_name='Число документов'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchterm',
+            constraint=models.UniqueConstraint(fields=('kind', 'term', 'block'), name='unique_search_block'),
+        ),
+        migrations.RunPython(split_postings, migrations.RunPython.noop),
+    ]
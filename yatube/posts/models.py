@@ -2,6 +2,8 @@ from xml.dom import ValidationErr
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .storage import image_storage
+
 
 User = get_user_model()
 
@@ -15,6 +17,12 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты с автором и группой одним запросом — как их выводят ленты."""
+        return self.select_related('author', 'author__stats', 'group')
+
+
 class Post(models.Model):
     text = models.TextField('Текст поста',
                             help_text='Напишите текст вашей записи.')
@@ -22,6 +30,10 @@ class Post(models.Model):
         'Дата публикации',
         auto_now_add=True
     )
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
     author = models.ForeignKey(
         User,
         verbose_name='Автор',
@@ -40,16 +52,47 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=image_storage,
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
+    archived = False
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx'),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'),
+        )
 
     def __str__(self):
         """Возвращаем автора, дату публикации, пост 15 символов."""
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        """Счётчик комментариев двигают только F()-обновления из сигналов,
+        поэтому при правке поста его не перезаписываем устаревшим значением.
+        """
+        if not self._state.adding and 'update_fields' not in kwargs:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'comments_count'
+            ]
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -66,6 +109,14 @@ class Comment(models.Model):
     text = models.TextField(verbose_name='Текст', max_length=5000)
     created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx'),
+        )
+
     def __str__(self):
         return self.text
 
@@ -88,6 +139,13 @@ class Follow(models.Model):
                 fields=['user', 'author'],
                 name='unique_following'),
         )
+        # Уникальность (user, author) уже даёт индекс для подписок
+        # пользователя, а этот — для подписчиков автора.
+        indexes = (
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_user_idx'),
+        )
 
     def no_self_follow(self):
         return (
@@ -97,3 +155,194 @@ class Follow(models.Model):
     def clean(self):
         if self.user == self.author:
             raise ValidationErr('нельзя подписаться на себя')
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, которые показывают профиль и страница поста."""
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE,
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    archived_posts_count = models.PositiveIntegerField(
+        'Постов в архиве', default=0
+    )
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    def __str__(self):
+        return str(self.user)
+
+    @property
+    def total_posts(self):
+        return self.posts_count + self.archived_posts_count
+
+
+class PostCounter(models.Model):
+    """Счётчик постов ленты: общий, группы или подписок.
+
+    Здесь же хранятся прочие числовые параметры лент, например порог
+    подписчиков для гибридной ленты.
+    """
+    key = models.CharField('Ключ', max_length=64, unique=True)
+    value = models.IntegerField('Значение', default=0)
+
+    def __str__(self):
+        return f'{self.key}={self.value}'
+
+
+class ImageBlob(models.Model):
+    """Файл картинки в хранилище по содержимому и число постов,
+    включая архивные, которые на него ссылаются."""
+    name = models.CharField('Имя файла', max_length=100, primary_key=True)
+    references = models.PositiveIntegerField('Ссылок', default=0)
+
+    def __str__(self):
+        return f'{self.name}×{self.references}'
+
+
+class FeedEntry(models.Model):
+    """Пост в ленте подписок пользователя, разложенный при публикации."""
+    user = models.ForeignKey(
+        User,
+        related_name='feed',
+        on_delete=models.CASCADE,
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='feed_entries',
+        on_delete=models.CASCADE,
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_feed_entry'),
+        )
+        indexes = (
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='feed_user_pub_date_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.user} <- {self.post_id}'
+
+
+class Celebrity(models.Model):
+    """Автор, чьи посты подмешиваются в ленты подписок при чтении."""
+    author = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='celebrity',
+        on_delete=models.CASCADE,
+    )
+
+    def __str__(self):
+        return str(self.author)
+
+
+class SearchTerm(models.Model):
+    """Основа слова и блок списка документов, где она встречается.
+
+    postings — пары (разница id с предыдущим, число вхождений) в varint:
+    id идут по возрастанию, поэтому разницы малы и занимают 1-2 байта.
+    В блоке block только id из [block * BLOCK_IDS, (block + 1) * BLOCK_IDS)
+    (см. posts.search), documents — сколько их там.
+    """
+    POST = 'post'
+    COMMENT = 'comment'
+    KINDS = ((POST, 'Пост'), (COMMENT, 'Комментарий'))
+
+    kind = models.CharField('Что ищем', max_length=16, choices=KINDS)
+    term = models.CharField('Основа слова', max_length=64)
+    block = models.PositiveIntegerField('Блок id', default=0)
+    postings = models.BinaryField('Документы')
+    documents = models.PositiveIntegerField('Число документов', default=0)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=['kind', 'term', 'block'],
+                name='unique_search_block'),
+        )
+
+    def __str__(self):
+        return f'{self.kind}:{self.term}'
+
+
+class ArchivedPost(models.Model):
+    """Пост старше ARCHIVE_AFTER_DAYS, перенесённый из posts_post.
+
+    id остаётся прежним, поэтому ссылки на пост продолжают работать.
+    Главная и ленты групп и подписок архив не читают.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации')
+    updated = models.DateTimeField('Дата изменения')
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        related_name='archived_posts'
+    )
+    group = models.ForeignKey(
+        Group,
+        verbose_name='Группа',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='archived_posts'
+    )
+    image = models.ImageField(
+        'Картинка', upload_to='posts/', storage=image_storage, blank=True
+    )
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+
+    objects = PostQuerySet.as_manager()
+    archived = True
+
+    class Meta:
+        ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='archived_author_pub_date_idx'),
+        )
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    """Комментарий к посту из архива."""
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        related_name='comments',
+        on_delete=models.CASCADE,
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='archived_comments',
+        on_delete=models.CASCADE,
+        verbose_name='Автор комментария',
+    )
+    text = models.TextField(verbose_name='Текст')
+    created = models.DateTimeField()
+
+    class Meta:
+        ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=['post', 'created'],
+                name='archived_comment_post_idx'),
+        )
+
+    def __str__(self):
+        return self.text
@@ -0,0 +1,183 @@
+import base64
+import binascii
+import heapq
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from . import counters, feed_cache
+from .settings import PER_PAGE
+
+
+def _encode(pub_date, pk):
+    raw = f'{pub_date.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def encode_cursor(post):
+    """Непрозрачный токен позиции поста в ленте: (pub_date, id)."""
+    return _encode(post.pub_date, post.pk)
+
+
+def decode_cursor(token):
+    """Разбирает токен; для битого токена возвращает None."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        pub_date, pk = raw.decode().split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+def canonical_cursor(token):
+    """Токен, заново собранный из разобранного, или '' для пустого
+    и битого: разные записи одной позиции дают один ключ кеша."""
+    cursor = decode_cursor(token)
+    if cursor is None:
+        return ''
+    pub_date, pk = cursor
+    if timezone.is_aware(pub_date):
+        pub_date = pub_date.astimezone(timezone.utc)
+    return _encode(pub_date, pk)
+
+
+class CountedPaginator(Paginator):
+    """Paginator, берущий count из хранилища счётчиков, а не COUNT(*).
+
+    Уже известное число записей можно передать напрямую в count.
+    """
+
+    def __init__(self, object_list, per_page, count_key=None, count=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        if count is not None:
+            self.__dict__['count'] = count
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        return counters.get_count(self.count_key, self.object_list)
+
+
+class CursorPaginator(CountedPaginator):
+    """Keyset-пагинация по (pub_date, id) без COUNT(*) и OFFSET.
+
+    Стоимость любой страницы — один range scan на per_page + 1 строк,
+    независимо от глубины. Страница — обычный Page, к которому добавлены
+    токены соседних страниц next_cursor и previous_cursor. keys — поля
+    (дата, id), по которым идёт seek; их значения должны совпадать
+    с post.pub_date и post.pk.
+    """
+
+    def __init__(self, object_list, per_page, count_key=None,
+                 keys=('pub_date', 'pk'), **kwargs):
+        super().__init__(object_list, per_page, count_key, **kwargs)
+        self.keys = keys
+
+    def _seek(self, cursor, op):
+        date_key, pk_key = self.keys
+        pub_date, pk = cursor
+        # OR сам по себе диапазоном индекса не станет: SQLite берёт
+        # диапазон по нестрогой границе даты, а OR только отсекает
+        # внутри него строки с той же датой.
+        return Q(**{f'{date_key}__{op}e': pub_date}) & (
+            Q(**{f'{date_key}__{op}': pub_date})
+            | Q(**{date_key: pub_date, f'{pk_key}__{op}': pk})
+        )
+
+    def page_queryset(self, cursor, forward):
+        """Запрос per_page + 1 строк за курсором: вперёд — по убыванию
+        даты."""
+        queryset = self.object_list
+        if cursor is not None:
+            queryset = queryset.filter(
+                self._seek(cursor, 'lt' if forward else 'gt')
+            )
+        order = [f'-{key}' if forward else key for key in self.keys]
+        return queryset.order_by(*order)[:self.per_page + 1]
+
+    def _fetch(self, cursor, forward):
+        return list(self.page_queryset(cursor, forward))
+
+    def get_page(self, after=None, before=None):
+        after, before = decode_cursor(after), decode_cursor(before)
+        if before is not None:
+            rows = self._fetch(before, forward=False)
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next, has_previous = True, has_more
+        else:
+            rows = self._fetch(after, forward=True)
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = after is not None
+        return self.make_page(
+            rows,
+            encode_cursor(rows[-1]) if rows and has_next else None,
+            encode_cursor(rows[0]) if rows and has_previous else None,
+        )
+
+    def make_page(self, rows, next_cursor, previous_cursor):
+        """Собирает Page из готовых строк, например взятых из кеша."""
+        page = self._get_page(rows, 1, self)
+        page.next_cursor = next_cursor
+        page.previous_cursor = previous_cursor
+        return page
+
+
+class MergedCursorPaginator(CursorPaginator):
+    """Keyset-пагинация по слиянию нескольких упорядоченных потоков.
+
+    streams — пары (queryset, keys); каждый поток читается тем же seek,
+    что и CursorPaginator, а результаты сливаются heapq.merge по
+    (pub_date, id). object_list нужен только для подсчёта count.
+    """
+
+    def __init__(self, object_list, per_page, streams, count_key=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, count_key, **kwargs)
+        self.streams = [
+            CursorPaginator(queryset, per_page, keys=keys)
+            for queryset, keys in streams
+        ]
+
+    def _fetch(self, cursor, forward):
+        merged = heapq.merge(
+            *(stream._fetch(cursor, forward) for stream in self.streams),
+            key=lambda post: (post.pub_date, post.pk),
+            reverse=forward,
+        )
+        rows, seen = [], set()
+        for post in merged:
+            if post.pk not in seen:
+                seen.add(post.pk)
+                rows.append(post)
+            if len(rows) > self.per_page:
+                break
+        return rows
+
+
+def paginate(request, queryset, per_page=PER_PAGE, count_key=None,
+             paginator_class=CursorPaginator, cache_key=None, **kwargs):
+    """Страница ленты по параметрам ?after= / ?before= запроса.
+
+    С cache_key (см. feed_cache.page_key) строки страницы берутся из кеша.
+    """
+    paginator = paginator_class(
+        queryset, per_page, count_key=count_key, **kwargs
+    )
+    after, before = request.GET.get('after'), request.GET.get('before')
+    if cache_key is None:
+        return paginator.get_page(after, before)
+    return feed_cache.get_page(paginator, cache_key, after, before)
@@ -0,0 +1,116 @@
+import re
+import sqlite3
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import Comment, Follow, Post
+from .paginators import CursorPaginator
+from .settings import PER_PAGE
+
+# Составные индексы горячих запросов: план «до» строится без них.
+HOT_INDEXES = (
+    'post_pub_date_idx',
+    'post_group_pub_date_idx',
+    'post_author_pub_date_idx',
+    'comment_post_created_idx',
+    'follow_author_user_idx',
+)
+
+
+def _after(queryset, pk):
+    """Страница ленты за курсором ?after=, как её читает CursorPaginator."""
+    return CursorPaginator(queryset, PER_PAGE).page_queryset(
+        (timezone.now(), pk), forward=True
+    )
+
+
+def hot_queries(pk=1):
+    """Горячие запросы страниц в том виде, в каком их строят представления:
+    тройки (название, запрос, колонка, по которой индекс должен дать
+    диапазон, или None)."""
+    return [
+        ('Посты автора по дате', Post.objects.filter(
+            author_id=pk
+        ).order_by('-pub_date', '-pk')[:PER_PAGE + 1], None),
+        ('Главная за курсором', _after(Post.objects.for_feed(), pk),
+         'pub_date'),
+        ('Посты автора за курсором',
+         _after(Post.objects.filter(author_id=pk), pk), 'pub_date'),
+        ('Посты группы за курсором',
+         _after(Post.objects.filter(group_id=pk), pk), 'pub_date'),
+        ('Комментарии поста', Comment.objects.filter(post_id=pk), None),
+        ('Подписчики автора', Follow.objects.filter(
+            author_id=pk
+        ).values_list('user_id', flat=True), None),
+        ('Подписки пользователя', Follow.objects.filter(
+            user_id=pk
+        ).values_list('author_id', flat=True), None),
+    ]
+
+
+def _schema(exclude):
+    """Таблицы и индексы базы, без исключённых и без виртуальных таблиц
+    с их служебными таблицами: для планов горячих запросов они не нужны."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE sql IS NOT NULL "
+            "AND type IN ('table', 'index') AND name NOT LIKE 'sqlite_%' "
+            "ORDER BY rowid"
+        )
+        rows = cursor.fetchall()
+    virtual = tuple(
+        f'{name}_' for name, sql in rows if sql.startswith('CREATE VIRTUAL')
+    )
+    return [
+        sql for name, sql in rows
+        if name not in exclude and not sql.startswith('CREATE VIRTUAL')
+        and not name.startswith(virtual)
+    ]
+
+
+def _plan(cursor, sql, params):
+    cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+    return [row[-1] for row in cursor.fetchall()]
+
+
+def compare():
+    """Планы горячих запросов без составных индексов и с ними:
+    (название, план до, план после, колонка диапазона).
+
+    «До» — та же схема в памяти, но без HOT_INDEXES, так что сравнение
+    не зависит от того, применена ли миграция у того, кто смотрит.
+    Только для SQLite.
+    """
+    before = sqlite3.connect(':memory:')
+    before.executescript(';\n'.join(_schema(HOT_INDEXES)))
+    plans = []
+    with connection.cursor() as cursor:
+        for name, queryset, column in hot_queries():
+            sql, params = queryset.query.sql_with_params()
+            plans.append((
+                name,
+                # Голое sqlite3 ждёт «?» вместо «%s» из Django.
+                _plan(
+                    before.cursor(), sql % (('?',) * len(params)), params
+                ),
+                _plan(cursor, sql, params),
+                column,
+            ))
+    before.close()
+    return plans
+
+
+def is_range_scan(plan, column=None):
+    """Ни полного прохода по таблице, ни сортировки во временном дереве.
+
+    С column индекс должен ещё и ограничить её диапазоном: для страницы
+    за курсором префикса (group_id=?) мало — строки группы тогда
+    фильтруются по одной.
+    """
+    if any(step.startswith('SCAN') or 'TEMP B-TREE' in step
+           for step in plan):
+        return False
+    return column is None or any(
+        re.search(rf'\b{column}[<>]', step) for step in plan
+    )
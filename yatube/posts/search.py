@@ -0,0 +1,276 @@
+import math
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.utils.functional import cached_property
+
+from core.db import run_locked
+
+from . import counters, stemmer
+from .models import Comment, Post, SearchTerm
+
+POST = SearchTerm.POST
+COMMENT = SearchTerm.COMMENT
+BATCH_SIZE = 500
+# Постинги основы режутся на блоки по диапазонам id: сохранение документа
+# переписывает только блок своего id, сколько бы документов ни было
+# у частой основы.
+BLOCK_IDS = 1024
+
+
+def block_of(pk):
+    return pk // BLOCK_IDS
+
+
+def _write_varint(value, out):
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode(postings):
+    """{id: частота} — в байты: пары (разница id, частота) в varint."""
+    out = bytearray()
+    previous = 0
+    for pk in sorted(postings):
+        _write_varint(pk - previous, out)
+        _write_varint(postings[pk], out)
+        previous = pk
+    return bytes(out)
+
+
+def decode(data):
+    numbers = []
+    value = shift = 0
+    for byte in bytes(data):
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            numbers.append(value)
+            value = shift = 0
+    postings = {}
+    pk = 0
+    for delta, frequency in zip(numbers[::2], numbers[1::2]):
+        pk += delta
+        postings[pk] = frequency
+    return postings
+
+
+def post_document(text, group_title=None, group_description=None):
+    """Текст, по которому находится пост: сам пост, название и описание
+    группы."""
+    return f'{text} {group_title or ""} {group_description or ""}'
+
+
+def frequencies(text):
+    return Counter(stemmer.tokenize(text or ''))
+
+
+def update(kind, documents):
+    """Переносит в индекс правки: тройки (id, старый текст, новый текст).
+
+    Новый документ — старый текст пустой, удалённый — пустой новый.
+    Каждый затронутый блок основы читается и переписывается один раз,
+    сколько бы документов его ни меняли.
+    """
+    changes = _changes(documents)
+    if changes:
+        _apply(kind, changes)
+
+
+def _changes(documents):
+    """{(основа, блок): {id: новая частота или 0}} по тройкам update."""
+    changes = defaultdict(dict)
+    for pk, old, new in documents:
+        before, after = frequencies(old), frequencies(new)
+        for term in before.keys() | after.keys():
+            if before[term] != after[term]:
+                changes[term, block_of(pk)][pk] = after[term]
+    return changes
+
+
+def _apply(kind, changes):
+    """Переписывает затронутые блоки под блокировкой записи: иначе
+    параллельные сохранения постов теряли бы правки друг друга или
+    падали с «database is locked»."""
+    run_locked(SearchTerm, _write, kind, changes)
+
+
+def _write(kind, changes):
+    rows = {
+        (row.term, row.block): row for row in SearchTerm.objects.filter(
+            kind=kind, term__in={term for term, _ in changes},
+            block__in={block for _, block in changes},
+        )
+    }
+    created, updated, emptied = [], [], []
+    for (term, block), docs in changes.items():
+        row = rows.get((term, block))
+        postings = decode(row.postings) if row else {}
+        for pk, frequency in docs.items():
+            if frequency:
+                postings[pk] = frequency
+            else:
+                postings.pop(pk, None)
+        if row is None:
+            if postings:
+                created.append(SearchTerm(
+                    kind=kind, term=term, block=block,
+                    postings=encode(postings), documents=len(postings),
+                ))
+        elif postings:
+            row.postings = encode(postings)
+            row.documents = len(postings)
+            updated.append(row)
+        else:
+            emptied.append(row.pk)
+    SearchTerm.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    SearchTerm.objects.bulk_update(
+        updated, ['postings', 'documents'], batch_size=BATCH_SIZE
+    )
+    SearchTerm.objects.filter(pk__in=emptied).delete()
+
+
+def _documents(kind):
+    if kind == POST:
+        return (
+            (pk, post_document(text, title, description))
+            for pk, text, title, description in Post.objects.values_list(
+                'pk', 'text', 'group__title', 'group__description'
+            ).iterator()
+        )
+    return Comment.objects.values_list('pk', 'text').iterator()
+
+
+def _index(documents):
+    index = defaultdict(dict)
+    for pk, text in documents:
+        for term, frequency in frequencies(text).items():
+            index[term][pk] = frequency
+    return index
+
+
+def build(documents):
+    """Закодированные постинги по парам (id, текст): {основа: байты}.
+
+    Одним списком на основу, как индекс лежал до блоков: так его
+    заполняют миграции 0026 и 0029.
+    """
+    return {
+        term: encode(postings)
+        for term, postings in _index(documents).items()
+    }
+
+
+def blocks(documents):
+    """Строки индекса по парам (id, текст): четвёрки
+    (основа, блок, закодированные постинги, число документов)."""
+    for term, postings in _index(documents).items():
+        split = defaultdict(dict)
+        for pk, frequency in postings.items():
+            split[block_of(pk)][pk] = frequency
+        for block, part in split.items():
+            yield term, block, encode(part), len(part)
+
+
+def rebuild():
+    """Пересобирает индекс с нуля, например после bulk_create и update(),
+    которые обходят сигналы."""
+    with transaction.atomic():
+        SearchTerm.objects.all().delete()
+        for kind in (POST, COMMENT):
+            SearchTerm.objects.bulk_create(
+                [
+                    SearchTerm(
+                        kind=kind, term=term, block=block,
+                        postings=postings, documents=documents,
+                    )
+                    for term, block, postings, documents in blocks(
+                        _documents(kind)
+                    )
+                ],
+                batch_size=BATCH_SIZE,
+            )
+    return SearchTerm.objects.count()
+
+
+def _postings(kind, query):
+    """Постинги основ запроса, от редкой к частой, и число документов
+    каждой основы; ([], []), если какой-то основы нет.
+
+    Читаются и разбираются только блоки, где есть все основы: число
+    документов основы берётся из строк блоков, а не из постингов.
+    """
+    terms = set(stemmer.tokenize(query))
+    if not terms:
+        return [], []
+    found = defaultdict(set)
+    counts = Counter()
+    for term, block, documents in SearchTerm.objects.filter(
+        kind=kind, term__in=terms
+    ).values_list('term', 'block', 'documents'):
+        found[term].add(block)
+        counts[term] += documents
+    if len(found) < len(terms):
+        return [], []
+    common = sorted(set.intersection(*found.values()))
+    lists = defaultdict(dict)
+    for start in range(0, len(common), BATCH_SIZE):
+        for term, postings in SearchTerm.objects.filter(
+            kind=kind, term__in=terms,
+            block__in=common[start:start + BATCH_SIZE],
+        ).values_list('term', 'postings'):
+            lists[term].update(decode(postings))
+    order = sorted(terms, key=counts.get)
+    return [lists[term] for term in order], [counts[term] for term in order]
+
+
+def matching_ids(kind, query):
+    """id документов, где есть все слова запроса в любой форме."""
+    lists, _ = _postings(kind, query)
+    if not lists:
+        return set()
+    return set(lists[0]).intersection(*lists[1:])
+
+
+def ranked(kind, query, total):
+    """Найденные id по убыванию tf-idf; total — число документов."""
+    lists, counts = _postings(kind, query)
+    found = set(lists[0]).intersection(*lists[1:]) if lists else set()
+    weights = [math.log(1 + total / count) for count in counts]
+    scores = {
+        pk: sum(
+            postings[pk] * weight
+            for postings, weight in zip(lists, weights)
+        )
+        for pk in found
+    }
+    return sorted(found, key=lambda pk: (-scores[pk], -pk))
+
+
+class SearchResults:
+    """Выдача по постам в порядке релевантности для Paginator.
+
+    Paginator нужны только count() и срезы: срез догружает посты
+    страницы одним запросом.
+    """
+
+    def __init__(self, query):
+        self.query = query
+
+    @cached_property
+    def ids(self):
+        total = counters.get_count(counters.ALL_KEY, Post.objects.all())
+        return ranked(POST, self.query, total)
+
+    def count(self):
+        return len(self.ids)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        ids = self.ids[item]
+        posts = Post.objects.for_feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
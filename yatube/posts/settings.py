@@ -1 +1,27 @@
 PER_PAGE = 10
+# Гибридная лента подписок: посты авторов, у которых подписчиков не меньше
+# порога, не раскладываются по лентам, а подмешиваются при чтении.
+# Порог — перцентиль числа подписчиков по Follow, но не ниже минимума.
+CELEBRITY_MIN_FOLLOWERS = 1000
+CELEBRITY_PERCENTILE = 0.99
+# Время жизни закешированных страниц лент. Инвалидация идёт по версиям,
+# которые поднимают сигналы Post и Follow, поэтому TTL может быть долгим.
+FEED_CACHE_TTL = 60 * 60 * 24
+# Посты старше стольких дней команда archive_posts переносит в архив:
+# главная и ленты их уже не показывают, а профиль и страница поста читают.
+ARCHIVE_AFTER_DAYS = 365
+# Варианты картинки поста для srcset: ширины, форматы и пропорции кадра.
+# Их заранее режет фоновый поток (см. posts.thumbnails), шаблоны берут
+# только готовые. Маленькие картинки не растягиваются. WebP режется, если
+# Pillow собран с libwebp; JPEG — запасной формат для <img>.
+IMAGE_WIDTHS = (320, 640, 960)
+IMAGE_FORMATS = ('WEBP', 'JPEG')
+IMAGE_RATIO = 339 / 960
+IMAGE_SIZES = '(max-width: 960px) 100vw, 960px'
+# Потолки загрузки картинки поста (см. posts.uploads). Файл больше
+# MAX_UPLOAD_SIZE бросается, не дописанный на диск; картинка
+# больше MAX_IMAGE_PIXELS отклоняется по заголовку. Пик памяти на картинку —
+# её файл (sorl читает его целиком) плюс декодированный кадр: до
+# MAX_IMAGE_PIXELS * 4 байт, а у JPEG благодаря draft() — в 4–64 раза меньше.
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40 * 10 ** 6
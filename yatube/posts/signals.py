@@ -0,0 +1,184 @@
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, feed_cache, feeds, search
+from .models import (ArchivedPost, Comment, Follow, Group, Post, User,
+                     UserStats)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+def bump_post_feeds(post, old_group_id=None):
+    """Поднимает версии лент, в которых виден пост."""
+    if feeds.is_celebrity(post.author_id):
+        followers = [(feed_cache.AUTHOR, post.author_id)]
+    else:
+        followers = [
+            (feed_cache.FOLLOW, user_id)
+            for user_id in Follow.objects.filter(
+                author_id=post.author_id
+            ).values_list('user_id', flat=True)
+        ]
+    groups = [
+        (feed_cache.GROUP, group_id)
+        for group_id in {post.group_id, old_group_id} if group_id
+    ]
+    feed_cache.bump(
+        (feed_cache.INDEX, None), (feed_cache.PROFILE, post.author_id),
+        *groups, *followers
+    )
+
+
+def post_document(post):
+    if not post.group_id:
+        return search.post_document(post.text)
+    return search.post_document(
+        post.text, post.group.title, post.group.description
+    )
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_group(sender, instance, **kwargs):
+    """Запоминаем прежнюю группу, чтобы заметить её смену при save(),
+    прежний текст для поискового индекса и прежнюю картинку для счётчика
+    ссылок на её файл."""
+    instance._old_group_id = None
+    instance._old_document = ''
+    instance._old_image = ''
+    if instance.pk:
+        old = Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'image', 'text', 'group__title',
+            'group__description',
+        ).first()
+        if old:
+            instance._old_group_id, instance._old_image = old[:2]
+            instance._old_document = search.post_document(*old[2:])
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_group_id = getattr(instance, '_old_group_id', None)
+    bump_post_feeds(instance, old_group_id)
+    search.update(search.POST, [(
+        instance.pk, getattr(instance, '_old_document', ''),
+        post_document(instance),
+    )])
+    images = Counter({instance.image.name: 1})
+    images[getattr(instance, '_old_image', '')] -= 1
+    counters.shift_images(images)
+    if created:
+        counters.incr(counters.post_keys(instance))
+        counters.shift(UserStats, instance.author_id, 1, 'posts_count')
+        feeds.fan_out(instance)
+        return
+    if old_group_id != instance.group_id:
+        if old_group_id:
+            counters.incr([counters.group_key(old_group_id)], -1)
+        if instance.group_id:
+            counters.incr([counters.group_key(instance.group_id)])
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.incr(counters.post_keys(instance), -1)
+    counters.shift(UserStats, instance.author_id, -1, 'posts_count')
+    counters.shift_images({instance.image.name: -1})
+    bump_post_feeds(instance)
+    search.update(search.POST, [(instance.pk, post_document(instance), '')])
+
+
+@receiver(post_delete, sender=ArchivedPost)
+def archived_post_deleted(sender, instance, **kwargs):
+    counters.shift_images({instance.image.name: -1})
+
+
+@receiver(pre_save, sender=Comment)
+def remember_old_comment(sender, instance, **kwargs):
+    instance._old_text = ''
+    if instance.pk:
+        instance._old_text = Comment.objects.filter(
+            pk=instance.pk
+        ).values_list('text', flat=True).first() or ''
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.shift(Post, instance.post_id, 1, 'comments_count')
+    search.update(search.COMMENT, [
+        (instance.pk, getattr(instance, '_old_text', ''), instance.text)
+    ])
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.shift(Post, instance.post_id, -1, 'comments_count')
+    search.update(search.COMMENT, [(instance.pk, instance.text, '')])
+
+
+def shift_follow(follow, delta):
+    counters.shift(UserStats, follow.author_id, delta, 'followers_count')
+    counters.shift(UserStats, follow.user_id, delta, 'following_count')
+    feed_cache.bump(
+        (feed_cache.FOLLOW, follow.user_id),
+        (feed_cache.PROFILE, follow.author_id),
+        (feed_cache.PROFILE, follow.user_id),
+    )
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        shift_follow(instance, 1)
+        feeds.check_author(instance.author_id)
+        feeds.backfill(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    shift_follow(instance, -1)
+    feeds.prune(instance)
+
+
+@receiver(pre_save, sender=Group)
+def remember_old_text(sender, instance, **kwargs):
+    """Запоминаем прежние название и описание для поискового индекса."""
+    instance._old_text = None
+    if instance.pk:
+        instance._old_text = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('title', 'description').first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    feed_cache.bump((feed_cache.GROUP, instance.pk))
+
+
+@receiver(post_save, sender=Group)
+def group_text_changed(sender, instance, created, raw=False, **kwargs):
+    """Название и описание группы ищутся вместе с постами, поэтому при их
+    правке переиндексируются все её посты — одним проходом по основам."""
+    old_text = getattr(instance, '_old_text', None)
+    new_text = (instance.title, instance.description)
+    if created or raw or old_text is None or old_text == new_text:
+        return
+    search.update(search.POST, (
+        (
+            pk,
+            search.post_document(text, *old_text),
+            search.post_document(text, *new_text),
+        )
+        for pk, text in instance.posts.values_list('pk', 'text').iterator()
+    ))
@@ -0,0 +1,146 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from django.db import connection
+
+from core.db import pragma_statements
+
+from .models import Post
+from .settings import PER_PAGE
+
+# Поведение SQLite без настройки: журнал отката и полная синхронизация.
+BASELINE_PRAGMAS = {'journal_mode': 'delete', 'synchronous': 'full'}
+# Как у соединений Django: sqlite3 по умолчанию ждёт блокировку 5 секунд.
+CONNECT_TIMEOUT = 5
+
+
+def _now():
+    # Django хранит даты в SQLite строками в UTC.
+    return datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')
+
+
+def _connect(path, pragmas):
+    db = sqlite3.connect(
+        path, timeout=CONNECT_TIMEOUT, isolation_level=None,
+        check_same_thread=False,
+    )
+    for statement in pragma_statements(pragmas):
+        db.execute(statement).fetchall()
+    return db
+
+
+def _snapshot(path, pragmas):
+    """Копия текущей базы с автором и постом для нагрузки.
+
+    Прогон пишет в копию, чтобы не засорять настоящую базу.
+    """
+    connection.ensure_connection()
+    db = sqlite3.connect(path)
+    connection.connection.backup(db)
+    db.close()
+    db = _connect(path, pragmas)
+    author_id = db.execute(
+        'INSERT INTO auth_user (password, is_superuser, username, '
+        'first_name, last_name, email, is_staff, is_active, date_joined) '
+        "VALUES ('!', 0, ?, '', '', '', 0, 1, ?)",
+        (f'bench-{time.time_ns()}', _now()),
+    ).lastrowid
+    post_id = _insert_post(db, author_id)
+    db.close()
+    return author_id, post_id
+
+
+def _insert_post(db, author_id):
+    return db.execute(
+        'INSERT INTO posts_post (text, pub_date, updated, author_id, image, '
+        "comments_count) VALUES ('Нагрузка', ?, ?, ?, '', 0)",
+        (_now(), _now(), author_id),
+    ).lastrowid
+
+
+def _writes(author_id, post_ids):
+    """post_create и add_comment: запись и сдвиг счётчика из сигнала,
+    каждая в своей транзакции, как в режиме autocommit у Django."""
+    def write(db):
+        if random.random() < 0.5:
+            post_ids.append(_insert_post(db, author_id))
+            db.execute(
+                'UPDATE posts_postcounter SET value = value + 1 '
+                "WHERE key = 'posts'"
+            )
+            return
+        post_id = random.choice(post_ids)
+        db.execute(
+            'INSERT INTO posts_comment (post_id, author_id, text, created) '
+            "VALUES (?, ?, 'Нагрузка', ?)",
+            (post_id, author_id, _now()),
+        )
+        db.execute(
+            'UPDATE posts_post SET comments_count = comments_count + 1 '
+            'WHERE id = ?', (post_id,),
+        )
+    return write
+
+
+def _reads():
+    """Первая страница главной в том виде, в каком её строит пагинатор."""
+    sql, params = Post.objects.for_feed().order_by(
+        '-pub_date', '-pk'
+    )[:PER_PAGE + 1].query.sql_with_params()
+    sql = sql % (('?',) * len(params))
+
+    def read(db):
+        db.execute(sql, params).fetchall()
+    return read
+
+
+def _worker(path, pragmas, operation, kind, deadline, totals, lock):
+    db = _connect(path, pragmas)
+    done = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            operation(db)
+            done += 1
+        except sqlite3.OperationalError as error:
+            # «database is locked» после истечения ожидания блокировки.
+            if 'locked' not in str(error):
+                raise
+            errors += 1
+    db.close()
+    with lock:
+        totals[kind] += done
+        totals['errors'] += errors
+
+
+def run(pragmas, writers=4, readers=8, seconds=5.0):
+    """Смешанная нагрузка на копию базы с заданными прагмами.
+
+    Возвращает число записей, чтений и ошибок блокировки за прогон.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+        author_id, post_id = _snapshot(path, pragmas)
+        write, read = _writes(author_id, [post_id]), _reads()
+        totals = {'writes': 0, 'reads': 0, 'errors': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + seconds
+        threads = [
+            threading.Thread(target=_worker, args=(
+                path, pragmas, operation, kind, deadline, totals, lock
+            ))
+            for operation, kind, count in (
+                (write, 'writes', writers), (read, 'reads', readers)
+            )
+            for _ in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    totals['seconds'] = seconds
+    return totals
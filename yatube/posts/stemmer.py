@@ -0,0 +1,187 @@
+"""Разбиение текста на слова и стемминг для русского и английского.
+
+Русский — алгоритм Snowball (Портера) для русского языка, английский —
+лёгкий стеммер, снимающий частые окончания. Язык слова определяется
+по алфавиту, цифры остаются как есть.
+"""
+import re
+
+WORD = re.compile(r'[а-яa-z0-9]+')
+CYRILLIC = re.compile(r'[а-я]')
+MIN_LENGTH = 2
+# Длиннее не влезет в SearchTerm.term, да и словом такое вряд ли будет.
+MAX_LENGTH = 64
+
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'в', 'во', 'вот', 'все', 'да', 'до', 'его', 'ее',
+    'же', 'за', 'и', 'из', 'или', 'им', 'их', 'к', 'как', 'ко', 'ли',
+    'мы', 'на', 'над', 'не', 'нет', 'ни', 'но', 'о', 'об', 'он', 'она',
+    'они', 'от', 'по', 'под', 'при', 'про', 'с', 'со', 'так', 'там',
+    'то', 'ты', 'у', 'уже', 'что', 'это', 'я',
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from',
+    'in', 'is', 'it', 'of', 'on', 'or', 'that', 'the', 'this', 'to',
+    'was', 'with',
+))
+
+RU_VOWELS = 'аеиоуыэюя'
+
+
+def _endings(group, after_a=()):
+    """Окончания класса от длинных к коротким; after_a — те, что
+    снимаются только после «а» или «я»."""
+    return sorted(
+        [(ending, False) for ending in group]
+        + [(ending, True) for ending in after_a],
+        key=lambda item: -len(item[0]),
+    )
+
+
+PERFECTIVE_GERUND = _endings(
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+    ('в', 'вши', 'вшись'),
+)
+REFLEXIVE = _endings(('ся', 'сь'))
+ADJECTIVE = _endings((
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+))
+PARTICIPLE = _endings(('ивш', 'ывш', 'ующ'), ('ем', 'нн', 'вш', 'ющ', 'щ'))
+VERB = _endings(
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+        'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+)
+NOUN = _endings((
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+))
+DERIVATIONAL = _endings(('ост', 'ость'))
+SUPERLATIVE = _endings(('ейш', 'ейше'))
+
+
+def _regions(word):
+    """Начала областей RV и R2 алгоритма Snowball."""
+    rv = next(
+        (i + 1 for i, char in enumerate(word) if char in RU_VOWELS),
+        len(word),
+    )
+
+    def after_syllable(start):
+        for i in range(start + 1, len(word)):
+            if word[i] not in RU_VOWELS and word[i - 1] in RU_VOWELS:
+                return i + 1
+        return len(word)
+
+    return rv, after_syllable(after_syllable(0))
+
+
+def _strip(word, start, endings):
+    """Снимает самое длинное окончание класса, лежащее в word[start:].
+
+    None — окончания нет или не выполнено условие «после а/я».
+    """
+    for ending, after_a in endings:
+        cut = len(word) - len(ending)
+        if cut < start or not word.endswith(ending):
+            continue
+        if after_a and (cut <= start or word[cut - 1] not in 'ая'):
+            return None
+        return word[:cut]
+    return None
+
+
+def _inflection(word, rv):
+    """Шаг 1: деепричастие либо возвратность и окончание прилагательного
+    (с причастием), глагола или существительного."""
+    stem = _strip(word, rv, PERFECTIVE_GERUND)
+    if stem is not None:
+        return stem
+    reflexive = _strip(word, rv, REFLEXIVE)
+    if reflexive is not None:
+        word = reflexive
+    stem = _strip(word, rv, ADJECTIVE)
+    if stem is not None:
+        participle = _strip(stem, rv, PARTICIPLE)
+        return stem if participle is None else participle
+    for endings in (VERB, NOUN):
+        stem = _strip(word, rv, endings)
+        if stem is not None:
+            return stem
+    return word
+
+
+def russian_stem(word):
+    rv, r2 = _regions(word)
+    word = _inflection(word, rv)
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    stem = _strip(word, r2, DERIVATIONAL)
+    if stem is not None:
+        word = stem
+    stem = _strip(word, rv, SUPERLATIVE)
+    if stem is not None:
+        word = stem
+    if word.endswith('нн') and len(word) - 1 >= rv:
+        word = word[:-1]
+    elif stem is None and word.endswith('ь') and len(word) - 1 >= rv:
+        word = word[:-1]
+    return word
+
+
+EN_VOWELS = 'aeiouy'
+EN_SUFFIXES = ('ment', 'ness', 'ful', 'less', 'ly')
+
+
+def _has_vowel(stem):
+    return any(char in EN_VOWELS for char in stem)
+
+
+def english_stem(word):
+    if word.endswith('ies') and len(word) > 4:
+        word = word[:-3] + 'y'
+    elif word.endswith('sses'):
+        word = word[:-2]
+    elif word.endswith('es') and word[:-2].endswith(('s', 'x', 'z', 'ch',
+                                                     'sh')):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+    for suffix in ('ing', 'ed'):
+        stem = word[:-len(suffix)]
+        if word.endswith(suffix) and len(stem) >= 3 and _has_vowel(stem):
+            word = stem
+            if word[-1] == word[-2] and word[-1] not in EN_VOWELS + 'lsz':
+                word = word[:-1]
+            break
+    for suffix in EN_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    return word
+
+
+def stem(word):
+    if word.isdigit():
+        return word
+    if CYRILLIC.search(word):
+        return russian_stem(word)
+    return english_stem(word)
+
+
+def tokenize(text):
+    """Основы значимых слов текста в порядке появления."""
+    words = WORD.findall(text.lower().replace('ё', 'е'))
+    return [
+        stem(word) for word in words
+        if MIN_LENGTH <= len(word) <= MAX_LENGTH
+        and word not in STOP_WORDS
+    ]
@@ -0,0 +1,58 @@
+"""Хранилище картинок постов, адресуемое содержимым.
+
+Файл называется SHA-256 своего содержимого и лежит в двухуровневом
+шардированном каталоге: posts/ab/cd/abcd….jpg. Одинаковая картинка,
+загруженная к нескольким постам, хранится один раз, и миниатюры sorl,
+ключ которых строится от имени файла, режутся для неё тоже один раз.
+
+Сколько постов, в том числе архивных, ссылаются на файл, хранит
+ImageBlob (см. counters.shift_images). delete() не трогает файл,
+на который ещё есть ссылки.
+"""
+import hashlib
+import os
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def content_name(self, name, content):
+        """Имя файла content в каталоге, куда его просили положить."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory = posixpath.dirname(name.replace('\\', '/'))
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(
+            directory, digest[:2], digest[2:4], digest + extension
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # Повторная загрузка молодит файл, чтобы сборщик сирот
+            # (см. media_gc.MIN_AGE) не удалил его до сохранения поста.
+            os.utime(self.path(name))
+            return name
+        return self._save(name, content)
+
+    def delete(self, name):
+        """Удаляет файл, только если на него не ссылается ни один пост."""
+        from .models import ImageBlob
+
+        if ImageBlob.objects.filter(name=name, references__gt=0).exists():
+            return
+        ImageBlob.objects.filter(name=name).delete()
+        super().delete(name)
+
+
+image_storage = ContentAddressedStorage()
@@ -0,0 +1,16 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/post_image.html', takes_context=True)
+def post_image(context, post):
+    """<picture> с вариантами картинки поста: из PageThumbnails страницы,
+    который view кладёт в контекст как post_thumbnails, а без него —
+    отдельным чтением kvstore."""
+    page = context.get('post_thumbnails')
+    if page is not None:
+        return {'image': page.get(post)}
+    return {'image': thumbnails.ready_image(post.image)}
@@ -0,0 +1,101 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import archive, counters, search
+from ..models import (ArchivedComment, ArchivedPost, Comment, Group, Post,
+                      User)
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.old = Post.objects.create(
+            text='Старинный пост', author=cls.author, group=cls.group
+        )
+        Post.objects.filter(pk=cls.old.pk).update(
+            pub_date=timezone.now() - timedelta(days=400)
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.old, author=cls.author, text='Старый комментарий'
+        )
+        cls.fresh = Post.objects.create(
+            text='Свежий пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_archive_moves_old_posts(self):
+        """Старый пост с комментариями переезжает в архив с тем же id."""
+        self.assertEqual(archive.archive(days=365), (1, 1))
+        self.assertFalse(Post.objects.filter(pk=self.old.pk).exists())
+        archived = ArchivedPost.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.text, self.old.text)
+        self.assertEqual(archived.comments_count, 1)
+        self.assertEqual(
+            ArchivedComment.objects.get(pk=self.comment.pk).post, archived
+        )
+        self.assertTrue(Post.objects.filter(pk=self.fresh.pk).exists())
+        self.assertEqual(archive.archive(days=365), (0, 0))
+
+    def test_counters_after_archive(self):
+        """Ленты считают только свежие посты, профиль — все."""
+        archive.archive(days=365)
+        self.assertEqual(
+            counters.get_count(counters.ALL_KEY, Post.objects.all()), 1
+        )
+        stats = counters.user_stats(User.objects.get(pk=self.author.pk))
+        self.assertEqual(
+            (stats.posts_count, stats.archived_posts_count), (1, 1)
+        )
+        counters.reconcile()
+        stats.refresh_from_db()
+        self.assertEqual(stats.total_posts, 2)
+        self.assertFalse(search.matching_ids(search.POST, 'старинный'))
+
+    def test_pages(self):
+        """Главная и группа не видят архив, профиль и страница поста —
+        видят."""
+        archive.archive(days=365)
+        for name, args in (('posts:index', ()),
+                           ('posts:group_list', (self.group.slug,))):
+            response = self.client.get(reverse(name, args=args))
+            self.assertNotContains(response, self.old.text)
+            self.assertContains(response, self.fresh.text)
+        response = self.client.get(
+            reverse('posts:profile', args=(self.author.username,))
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [self.fresh.pk, self.old.pk],
+        )
+        self.assertContains(response, 'Всего постов: 2')
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.old.pk,))
+        )
+        self.assertContains(response, self.comment.text)
+        self.assertNotContains(
+            response, reverse('posts:add_comment', args=(self.old.pk,))
+        )
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:post_detail', args=(10 ** 6,))
+            ).status_code,
+            404,
+        )
+
+    def test_command(self):
+        """Команда сообщает, сколько перенесено."""
+        out = StringIO()
+        call_command('archive_posts', days=365, stdout=out)
+        self.assertIn('постов: 1, комментариев: 1', out.getvalue())
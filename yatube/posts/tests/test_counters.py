@@ -0,0 +1,133 @@
+import sqlite3
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from .. import counters
+from ..models import (Celebrity, Comment, Follow, Group, Post, PostCounter,
+                      User, UserStats)
+from ..paginators import CountedPaginator
+
+
+def stored(key):
+    return PostCounter.objects.get(key=key).value
+
+
+def stats(user):
+    return UserStats.objects.get(user=user)
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='other', description='Описание'
+        )
+        Post.objects.create(text='Первый', author=cls.author, group=cls.group)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        counters.rebuild()
+
+    def test_rebuild(self):
+        """rebuild раскладывает счётчики по всем лентам."""
+        self.assertEqual(stored(counters.ALL_KEY), 1)
+        self.assertEqual(stored(counters.group_key(self.group.pk)), 1)
+        self.assertEqual(counters.follow_count(self.reader.pk), 1)
+
+    def test_post_signals(self):
+        """Создание, смена группы и удаление поста двигают счётчики."""
+        post = Post.objects.create(
+            text='Второй', author=self.author, group=self.group
+        )
+        self.assertEqual(stored(counters.ALL_KEY), 2)
+        self.assertEqual(stored(counters.group_key(self.group.pk)), 2)
+        self.assertEqual(counters.follow_count(self.reader.pk), 2)
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(stored(counters.group_key(self.group.pk)), 1)
+        post.delete()
+        self.assertEqual(stored(counters.ALL_KEY), 1)
+        self.assertEqual(stats(self.author).posts_count, 1)
+
+    def test_follow_signals(self):
+        """Отписка убирает посты автора из длины ленты подписок."""
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertEqual(counters.follow_count(self.reader.pk), 0)
+
+    @skipUnless(
+        hasattr(sqlite3.Connection, 'setlimit'), 'нужен Python 3.11+'
+    )
+    def test_celebrity_post_above_variable_limit(self):
+        """Пост и его удаление у автора, подписчиков у которого больше
+        лимита переменных SQLite, не упираются в этот лимит."""
+        Celebrity.objects.create(author=self.author)
+        User.objects.bulk_create(
+            User(username=f'fan{number}') for number in range(120)
+        )
+        Follow.objects.bulk_create(
+            Follow(user=user, author=self.author)
+            for user in User.objects.filter(username__startswith='fan')
+        )
+        connection.ensure_connection()
+        limit = connection.connection.setlimit(
+            sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 100
+        )
+        self.addCleanup(
+            connection.connection.setlimit,
+            sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, limit,
+        )
+        post = Post.objects.create(text='Для всех', author=self.author)
+        self.assertEqual(counters.follow_count(self.reader.pk), 2)
+        post.delete()
+        self.assertEqual(counters.follow_count(self.reader.pk), 1)
+
+    def test_stats_columns(self):
+        """Посты, подписки и комментарии двигают счётчики-колонки."""
+        author = stats(self.author)
+        self.assertEqual(
+            (author.posts_count, author.followers_count,
+             author.following_count),
+            (1, 1, 0),
+        )
+        self.assertEqual(stats(self.reader).following_count, 1)
+        post = Post.objects.get()
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий'
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        post.text = 'Правка'
+        Post.objects.filter(pk=post.pk).update(comments_count=5)
+        post.save()
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).comments_count, 5,
+            'Правка поста не должна затирать счётчик комментариев',
+        )
+        comment.delete()
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 4)
+
+    def test_paginator_reads_store(self):
+        """CountedPaginator не делает COUNT(*) по таблице постов."""
+        paginator = CountedPaginator(
+            Post.objects.all(), 10, counters.ALL_KEY
+        )
+        PostCounter.objects.filter(key=counters.ALL_KEY).update(value=42)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 42)
+
+    def test_command_repairs_drift(self):
+        """rebuild_counters чинит разошедшиеся счётчики."""
+        PostCounter.objects.update(value=100)
+        UserStats.objects.update(posts_count=100)
+        Post.objects.update(comments_count=100)
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertEqual(stored(counters.ALL_KEY), 1)
+        self.assertEqual(stats(self.author).posts_count, 1)
+        self.assertEqual(Post.objects.get().comments_count, 0)
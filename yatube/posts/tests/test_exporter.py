@@ -0,0 +1,135 @@
+import csv
+import json
+from datetime import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import archive, exporter, importer
+from ..models import ArchivedComment, ArchivedPost, Comment, Group, Post, User
+
+EXPORT = reverse('posts:export')
+
+
+class ExporterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.other = User.objects.create(username='other')
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+        cls.group = Group.objects.create(
+            title='Коты', slug='cats', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост в группе', author=cls.author, group=cls.group
+        )
+        cls.old = Post.objects.create(text='Старый пост', author=cls.other)
+        Post.objects.filter(pk=cls.old.pk).update(
+            pub_date=timezone.make_aware(datetime(2019, 5, 1))
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.other, text='Комментарий'
+        )
+
+    def export(self, **filters):
+        return list(exporter.records(**filters))
+
+    def test_records(self):
+        """Записи несут имена авторов и slug групп в формате импорта."""
+        post, old, comment = self.export()
+        self.assertEqual(
+            {key: post[key] for key in ('type', 'id', 'author', 'group')},
+            {'type': importer.POST, 'id': self.post.pk,
+             'author': 'author', 'group': 'cats'},
+        )
+        self.assertIsNone(old['group'])
+        self.assertEqual(comment['post'], self.post.pk)
+        self.assertEqual(comment['author'], 'other')
+
+    def test_one_query_per_kind(self):
+        """Имена приходят JOIN-ом, а не запросом на строку: по запросу
+        на свежую и архивную таблицу постов и комментариев."""
+        for number in range(20):
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+        with self.assertNumQueries(4):
+            self.export()
+
+    def test_filters(self):
+        """Фильтры по автору, группе и датам сужают выгрузку."""
+        ids = {
+            (record['type'], record['id'])
+            for record in self.export(author='other')
+        }
+        self.assertEqual(
+            ids, {('post', self.old.pk), ('comment', self.comment.pk)}
+        )
+        self.assertEqual(
+            [record['id'] for record in self.export(
+                kinds=(importer.POST,), group='cats'
+            )],
+            [self.post.pk],
+        )
+        self.assertEqual(
+            [record['id'] for record in self.export(
+                kinds=(importer.POST,), until='2019-12-31'
+            )],
+            [self.old.pk],
+        )
+        with self.assertRaises(ValueError):
+            self.export(since='вчера')
+
+    def test_command_round_trip(self):
+        """Выгрузку команды читает импорт."""
+        out = StringIO()
+        call_command('export_yatube', format='csv', stdout=out)
+        rows = list(importer.read_records(StringIO(out.getvalue()), 'csv'))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['text'], self.post.text)
+
+    def test_archive_round_trip(self):
+        """Архивные посты и комментарии выгружаются и загружаются
+        обратно, а повторный импорт их не задваивает."""
+        Comment.objects.create(
+            post=self.old, author=self.author, text='Под старым'
+        )
+        archive.archive(days=365)
+        records = self.export()
+        self.assertEqual(
+            [(record['type'], record['id']) for record in records],
+            [('post', self.post.pk), ('post', self.old.pk),
+             ('comment', self.comment.pk),
+             ('comment', ArchivedComment.objects.get().pk)],
+        )
+        importer.Importer().run(iter(records))
+        self.assertFalse(Post.objects.filter(pk=self.old.pk).exists())
+        ArchivedPost.objects.all().delete()
+        importer.Importer().run(iter(records))
+        self.assertEqual(
+            Post.objects.get(pk=self.old.pk).comments.get().text,
+            'Под старым',
+        )
+
+    def test_view_is_staff_only(self):
+        """Выгрузка через сайт доступна только персоналу."""
+        client = Client()
+        client.force_login(self.author)
+        self.assertEqual(client.get(EXPORT).status_code, 302)
+        client.force_login(self.staff)
+        response = client.get(EXPORT, {'type': 'post', 'author': 'author'})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)['id'] for line in lines], [self.post.pk]
+        )
+        response = client.get(EXPORT, {'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        header = next(csv.reader(
+            b''.join(response.streaming_content).decode().splitlines()
+        ))
+        self.assertEqual(tuple(header), exporter.COLUMNS)
+        self.assertEqual(
+            client.get(EXPORT, {'since': 'вчера'}).status_code, 400
+        )
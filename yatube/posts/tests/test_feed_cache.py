@@ -0,0 +1,173 @@
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import feed_cache, paginators
+from ..models import Follow, Group, Post, User
+
+INDEX = reverse('posts:index')
+FOLLOW_INDEX = reverse('posts:follow_index')
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.other = User.objects.create(username='other')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(text='Первый', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.other_client = Client()
+        self.other_client.force_login(self.other)
+
+    def test_bump_changes_version(self):
+        """bump поднимает версию только своей ленты."""
+        index = feed_cache.versions((feed_cache.INDEX, None))
+        follow = feed_cache.versions((feed_cache.FOLLOW, self.reader.pk))
+        feed_cache.bump((feed_cache.INDEX, None))
+        self.assertNotEqual(
+            feed_cache.versions((feed_cache.INDEX, None)), index
+        )
+        self.assertEqual(
+            feed_cache.versions((feed_cache.FOLLOW, self.reader.pk)), follow
+        )
+
+    def test_page_key_uses_decoded_cursor(self):
+        """Битый курсор даёт ключ первой страницы, а та же позиция,
+        записанная в другом часовом поясе, — ключ той же страницы."""
+        moscow = self.post.pub_date.astimezone(timezone.get_fixed_timezone(
+            180
+        ))
+        keys = [
+            feed_cache.page_key(
+                RequestFactory().get(INDEX, query), feed_cache.INDEX
+            )
+            for query in (
+                {}, {'after': 'мусор'},
+                {'after': paginators.encode_cursor(self.post)},
+                {'after': paginators.encode_cursor(
+                    Post(pk=self.post.pk, pub_date=moscow)
+                )},
+            )
+        ]
+        self.assertEqual(keys[0], keys[1])
+        self.assertNotEqual(keys[0], keys[2])
+        self.assertEqual(keys[2], keys[3])
+
+    def test_index_page_served_from_cache(self):
+        """Повторный запрос главной не ходит за постами в базу."""
+        self.client.get(INDEX)
+        with self.assertNumQueries(0):
+            response = self.client.get(INDEX)
+        self.assertEqual(list(response.context['page_obj']), [self.post])
+
+    def test_new_post_invalidates_feeds(self):
+        """Новый пост сразу виден на главной и в ленте подписчика."""
+        self.client.get(INDEX)
+        self.reader_client.get(FOLLOW_INDEX)
+        post = Post.objects.create(text='Второй', author=self.author)
+        self.assertContains(self.client.get(INDEX), post.text)
+        self.assertContains(self.reader_client.get(FOLLOW_INDEX), post.text)
+
+    def test_follow_feeds_are_per_user(self):
+        """Лента подписок одного пользователя не достаётся другому."""
+        self.assertContains(
+            self.reader_client.get(FOLLOW_INDEX), self.post.text
+        )
+        self.assertNotContains(
+            self.other_client.get(FOLLOW_INDEX), self.post.text
+        )
+        Follow.objects.create(user=self.other, author=self.author)
+        self.assertContains(
+            self.other_client.get(FOLLOW_INDEX), self.post.text
+        )
+
+
+class GroupFeedCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.group = Group.objects.create(
+            title='Первая', slug='first', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Вторая', slug='second', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост группы', author=cls.author, group=cls.group
+        )
+        cls.urls = [
+            reverse('posts:group_list', args=(group.slug,))
+            for group in (cls.group, cls.other_group)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def assertMoved(self):
+        first, second = (self.client.get(url) for url in self.urls)
+        self.assertNotContains(first, self.post.text)
+        self.assertContains(second, self.post.text)
+
+    def test_group_page_served_from_cache(self):
+        """Повторный запрос группы читает из базы только саму группу."""
+        self.client.get(self.urls[0])
+        with self.assertNumQueries(2):
+            response = self.client.get(self.urls[0])
+        self.assertEqual(list(response.context['page_obj']), [self.post])
+
+    def test_group_feed_is_scoped(self):
+        """В ленте группы только её посты, счётчик — по группе."""
+        Post.objects.create(text='Без группы', author=self.author)
+        page_obj = self.client.get(self.urls[0]).context['page_obj']
+        self.assertEqual(list(page_obj), [self.post])
+        self.assertEqual(page_obj.paginator.count, 1)
+
+    def test_create_invalidates_group(self):
+        """Пост, созданный через форму, сразу виден в группе."""
+        self.client.get(self.urls[1])
+        self.author_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Новый пост', 'group': self.other_group.pk},
+        )
+        self.assertContains(self.client.get(self.urls[1]), 'Новый пост')
+
+    def test_edit_moves_post(self):
+        """Смена группы в post_edit сбрасывает кеш обеих групп."""
+        for url in self.urls:
+            self.client.get(url)
+        self.author_client.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': self.post.text, 'group': self.other_group.pk},
+        )
+        self.assertMoved()
+
+    def test_admin_list_editable_moves_post(self):
+        """Смена группы в списке постов админки сбрасывает кеш групп."""
+        for url in self.urls:
+            self.client.get(url)
+        self.admin_client.post(
+            reverse('admin:posts_post_changelist'), {
+                'form-TOTAL_FORMS': 1,
+                'form-INITIAL_FORMS': 1,
+                'form-MIN_NUM_FORMS': 0,
+                'form-MAX_NUM_FORMS': 1000,
+                'form-0-id': self.post.pk,
+                'form-0-group': self.other_group.pk,
+                '_save': 'Сохранить',
+            },
+        )
+        self.assertMoved()
@@ -0,0 +1,116 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import feeds
+from ..models import Celebrity, FeedEntry, Follow, Post, PostCounter, User
+from ..settings import PER_PAGE
+
+FOLLOW_INDEX = reverse('posts:follow_index')
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.old_post = Post.objects.create(text='Старый', author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed(self):
+        return list(self.client.get(FOLLOW_INDEX).context['page_obj'])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка добавляет старые посты автора, отписка убирает их."""
+        self.client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+        self.assertEqual(self.feed(), [self.old_post])
+        self.client.get(
+            reverse('posts:profile_unfollow', args=(self.author.username,))
+        )
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed(), [])
+
+    def test_new_post_fans_out(self):
+        """Новый пост попадает в ленты подписчиков при публикации."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый', author=self.author)
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    def test_rebuild_command(self):
+        """rebuild_feeds восстанавливает потерянные записи лент."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        FeedEntry.objects.all().delete()
+        call_command('rebuild_feeds', stdout=StringIO())
+        self.assertEqual(self.feed(), [self.old_post])
+
+
+class HybridFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.star = User.objects.create(username='star')
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.fan = User.objects.create(username='fan')
+        PostCounter.objects.create(key=feeds.THRESHOLD_KEY, value=2)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.star)
+        Follow.objects.create(user=cls.fan, author=cls.star)
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=author)
+            for i, author in enumerate(
+                [cls.star, cls.author] * PER_PAGE
+            )
+        ][::-1]
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_celebrity_is_pulled_not_pushed(self):
+        """Посты знаменитости не раскладываются, но есть в ленте."""
+        self.assertTrue(feeds.is_celebrity(self.star.pk))
+        self.assertFalse(
+            FeedEntry.objects.filter(post__author=self.star).exists()
+        )
+        response = self.client.get(FOLLOW_INDEX)
+        page = response.context['page_obj']
+        self.assertEqual(list(page), self.posts[:PER_PAGE])
+        response = self.client.get(FOLLOW_INDEX, {'after': page.next_cursor})
+        self.assertEqual(
+            list(response.context['page_obj']), self.posts[PER_PAGE:]
+        )
+
+    def test_review_demotes_below_threshold(self):
+        """review возвращает автора к раскладке, если порог вырос."""
+        with mock.patch.object(feeds, 'CELEBRITY_MIN_FOLLOWERS', 3):
+            threshold, celebrities = feeds.review()
+        self.assertEqual((threshold, celebrities), (3, set()))
+        self.assertFalse(Celebrity.objects.exists())
+        self.assertEqual(
+            FeedEntry.objects.filter(post__author=self.star).count(),
+            PER_PAGE * 2,
+        )
+        self.assertEqual(
+            list(self.client.get(FOLLOW_INDEX).context['page_obj']),
+            self.posts[:PER_PAGE],
+        )
+
+    def test_follow_only_checks_its_author(self):
+        """Подписка не запускает пересмотр всех знаменитостей, а только
+        продвигает своего автора, перешедшего порог."""
+        with mock.patch.object(feeds, 'review') as review:
+            Follow.objects.create(user=self.fan, author=self.author)
+            Follow.objects.filter(user=self.fan, author=self.author).delete()
+        review.assert_not_called()
+        self.assertTrue(feeds.is_celebrity(self.author.pk))
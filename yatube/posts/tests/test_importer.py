@@ -0,0 +1,142 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import counters, importer, search
+from ..models import Comment, FeedEntry, Follow, Group, Post, User
+
+RECORDS = [
+    {'type': 'post', 'id': 101, 'author': 'author', 'group': 'cats',
+     'text': 'Импортированный пост', 'pub_date': '2020-01-02T03:04:05'},
+    {'type': 'post', 'id': 102, 'author': 'author', 'text': 'Второй'},
+    {'type': 'comment', 'id': 201, 'post': 101, 'author': 'reader',
+     'text': 'Комментарий', 'created': '2020-01-03T00:00:00'},
+    {'type': 'follow', 'user': 'reader', 'author': 'author'},
+    {'type': 'post', 'author': 'nobody', 'text': 'Чужой'},
+    {'type': 'comment', 'post': 999, 'author': 'reader', 'text': 'Мимо'},
+    {'type': 'like', 'user': 'reader'},
+]
+
+
+class ImporterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Коты', slug='cats', description='Описание'
+        )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write_jsonl(self, records):
+        path = os.path.join(self.directory, 'data.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return path
+
+    def run_command(self, path, **options):
+        out = StringIO()
+        call_command('import_yatube', path, stdout=out, **options)
+        return out.getvalue()
+
+    def test_import(self):
+        """Записи ложатся в таблицы с id и датами из файла,
+        нерешаемые — пропускаются."""
+        out = self.run_command(self.write_jsonl(RECORDS), batch_size=2)
+        post = Post.objects.get(pk=101)
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.pub_date, timezone.make_aware(
+            datetime(2020, 1, 2, 3, 4, 5)
+        ))
+        self.assertEqual(
+            list(Comment.objects.values_list('pk', 'post_id')), [(201, 101)]
+        )
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.author
+        ).exists())
+        self.assertIn('пропущено: 3', out)
+        self.assertIn('записей/с', out)
+
+    def test_repair(self):
+        """После импорта счётчики, ленты и поиск видят новые записи."""
+        self.run_command(self.write_jsonl(RECORDS))
+        self.assertEqual(
+            counters.get_count(counters.ALL_KEY, Post.objects.all()), 2
+        )
+        author = User.objects.get(pk=self.author.pk)
+        self.assertEqual(counters.user_stats(author).posts_count, 2)
+        self.assertEqual(Post.objects.get(pk=101).comments_count, 1)
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(), 2)
+        self.assertEqual(
+            search.matching_ids(search.POST, 'импортированные посты'), {101}
+        )
+
+    def test_repair_touches_only_batch(self):
+        """Пачка обновляет счётчики лент и свои строки, а чужие
+        не пересчитывает."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        before = Post.objects.create(text='Старый', author=self.reader)
+        Post.objects.filter(pk=before.pk).update(comments_count=5)
+        self.assertEqual(counters.follow_count(self.reader.pk), 0)
+        self.run_command(self.write_jsonl(RECORDS[:3]))
+        self.assertEqual(Post.objects.get(pk=before.pk).comments_count, 5)
+        self.assertEqual(Post.objects.get(pk=101).comments_count, 1)
+        self.assertEqual(counters.follow_count(self.reader.pk), 2)
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(), 2)
+
+    def test_no_repair(self):
+        """С --no-repair индекс и ленты не трогаются."""
+        self.run_command(self.write_jsonl(RECORDS), no_repair=True)
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(
+            search.matching_ids(search.POST, 'импортированные посты'), set()
+        )
+
+    def test_repeat_is_idempotent(self):
+        """Повторный импорт того же файла ничего не задваивает."""
+        path = self.write_jsonl(RECORDS)
+        self.run_command(path)
+        self.run_command(path)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_resume_from_checkpoint(self):
+        """С контрольной точкой импорт пропускает уже записанное."""
+        path = self.write_jsonl(RECORDS)
+        checkpoint = os.path.join(self.directory, 'checkpoint.json')
+        importer.write_checkpoint(checkpoint, path, 2)
+        out = self.run_command(path, checkpoint=checkpoint)
+        self.assertIn('Продолжаем с записи 2', out)
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_csv_and_create_users(self):
+        """CSV читается по колонкам, неизвестные авторы заводятся."""
+        path = os.path.join(self.directory, 'data.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            file.write(
+                'type,id,author,group,text\n'
+                'post,7,newcomer,,"Текст, с запятой"\n'
+            )
+        self.run_command(path, create_users=True)
+        post = Post.objects.get(pk=7)
+        self.assertEqual(post.author.username, 'newcomer')
+        self.assertEqual(post.text, 'Текст, с запятой')
+        self.assertFalse(post.author.has_usable_password())
+
+    def test_auto_dates_restored(self):
+        """После импорта auto_now_add снова работает."""
+        self.run_command(self.write_jsonl(RECORDS[:1]))
+        post = Post.objects.create(text='Новый', author=self.author)
+        self.assertGreater(post.pub_date.year, 2020)
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import get_thumbnail
+
+from .. import media_gc
+from ..models import Post, User
+from .utils import RED_GIF, SMALL_GIF
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaGCTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(text='С картинкой', author=self.author)
+        self.post.image.save('kept.gif', ContentFile(SMALL_GIF))
+        self.thumbnail = get_thumbnail(self.post.image, '10x10').name
+        self.orphan = Post.objects.create(text='Удалят', author=self.author)
+        self.orphan.image.save('orphan.gif', ContentFile(RED_GIF))
+        self.orphan_thumbnail = get_thumbnail(self.orphan.image, '10x10').name
+        self.orphan.delete()
+        self.stray = os.path.join(TEMP_MEDIA_ROOT, 'cache', 'ab', 'stray.jpg')
+        os.makedirs(os.path.dirname(self.stray), exist_ok=True)
+        with open(self.stray, 'wb') as file:
+            file.write(SMALL_GIF)
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(TEMP_MEDIA_ROOT, name))
+
+    def collect(self, delete):
+        return sorted(media_gc.collect(delete, batch_size=2, min_age=0))
+
+    def test_dry_run_keeps_files(self):
+        """Без delete сироты только перечисляются."""
+        self.assertEqual(self.collect(False), [
+            (media_gc.IMAGE, self.orphan.image.name),
+            (media_gc.THUMBNAIL, 'cache/ab/stray.jpg'),
+        ])
+        self.assertTrue(self.exists(self.orphan.image.name))
+        self.assertTrue(os.path.exists(self.stray))
+
+    def test_delete(self):
+        """Удаляются сироты и миниатюры удалённой картинки,
+        картинка живого поста и её миниатюра остаются."""
+        self.collect(True)
+        self.assertFalse(self.exists(self.orphan.image.name))
+        self.assertFalse(self.exists(self.orphan_thumbnail))
+        self.assertFalse(os.path.exists(self.stray))
+        self.assertTrue(self.exists(self.post.image.name))
+        self.assertTrue(self.exists(self.thumbnail))
+        self.assertEqual(self.collect(False), [])
+
+    def test_fresh_files_skipped(self):
+        """Файлы моложе min_age не трогаются."""
+        self.assertEqual(list(media_gc.collect(True, min_age=60)), [])
+        self.assertTrue(self.exists(self.orphan.image.name))
+
+    def test_command(self):
+        """--dry-run печатает итог со словом «Найдено»."""
+        out = StringIO()
+        call_command('collect_media', dry_run=True, min_age=0, stdout=out)
+        self.assertIn('Найдено картинок: 1, миниатюр: 1', out.getvalue())
@@ -0,0 +1,89 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+from ..paginators import CursorPaginator, decode_cursor, encode_cursor
+from ..settings import PER_PAGE
+
+TOTAL_POSTS = PER_PAGE * 2 + 3
+INDEX = reverse('posts:index')
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='tester')
+        # bulk_create даёт одинаковые pub_date — порядок держится на id.
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', author=cls.user)
+            for i in range(TOTAL_POSTS)
+        ])
+        cls.expected = list(Post.objects.order_by('-pub_date', '-pk'))
+
+    def test_cursor_roundtrip(self):
+        """Токен раскодируется обратно в (pub_date, id)."""
+        post = self.expected[0]
+        self.assertEqual(
+            decode_cursor(encode_cursor(post)), (post.pub_date, post.pk)
+        )
+        self.assertIsNone(decode_cursor('мусор'))
+
+    def test_walk_forward_and_back(self):
+        """Проход вперёд и назад возвращает все посты без пропусков."""
+        paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+        pages = [paginator.get_page()]
+        while pages[-1].next_cursor:
+            pages.append(paginator.get_page(after=pages[-1].next_cursor))
+        self.assertEqual(
+            [post for page in pages for post in page], self.expected
+        )
+        self.assertIsNone(pages[0].previous_cursor)
+        self.assertEqual(len(pages[-1]), TOTAL_POSTS % PER_PAGE)
+        back = paginator.get_page(before=pages[1].previous_cursor)
+        self.assertEqual(list(back), list(pages[0]))
+        self.assertIsNone(back.previous_cursor)
+
+    def test_page_has_no_count_query(self):
+        """Страница строится одним запросом, без COUNT(*)."""
+        paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+        with self.assertNumQueries(1):
+            len(paginator.get_page())
+
+    def test_index_uses_cursor(self):
+        """Главная отдаёт следующую страницу по ?after=."""
+        response = self.client.get(INDEX)
+        cursor = response.context['page_obj'].next_cursor
+        response = self.client.get(INDEX, {'after': cursor})
+        self.assertEqual(
+            list(response.context['page_obj']),
+            self.expected[PER_PAGE:PER_PAGE * 2],
+        )
+
+    @skipUnless(connection.vendor == 'sqlite', 'план запроса SQLite')
+    def test_seek_is_index_range(self):
+        """Страница за курсором — диапазон индекса по дате, а не проход
+        по всем постам ленты с сортировкой."""
+        group = Group.objects.create(title='Группа', slug='group')
+        cursor = (self.expected[5].pub_date, self.expected[5].pk)
+        for queryset, index in (
+            (Post.objects.for_feed(), 'post_pub_date_idx'),
+            (Post.objects.filter(group=group), 'post_group_pub_date_idx'),
+            (Post.objects.filter(author=self.user),
+             'post_author_pub_date_idx'),
+        ):
+            for forward in (True, False):
+                sql, params = CursorPaginator(
+                    queryset, PER_PAGE
+                ).page_queryset(cursor, forward).query.sql_with_params()
+                with connection.cursor() as db:
+                    db.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                    plan = ' | '.join(row[-1] for row in db.fetchall())
+                with self.subTest(index=index, forward=forward):
+                    self.assertRegex(
+                        plan, rf'USING INDEX {index} \(.*pub_date[<>]'
+                    )
+                    self.assertNotIn('TEMP B-TREE', plan)
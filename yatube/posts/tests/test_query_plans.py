@@ -0,0 +1,44 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from .. import query_plans
+
+
+@skipUnless(connection.vendor == 'sqlite', 'планы запросов SQLite')
+class QueryPlansTests(TestCase):
+    def test_hot_queries_use_range_scans(self):
+        """С составными индексами горячие запросы обходятся без сортировки,
+        а страницы за курсором читают диапазон индекса по дате."""
+        for name, before, after, column in query_plans.compare():
+            with self.subTest(query=name):
+                self.assertTrue(
+                    query_plans.is_range_scan(after, column), after
+                )
+
+    def test_indexes_remove_sorting(self):
+        """Без индексов посты и комментарии сортируются во временном дереве."""
+        plans = {
+            name: (before, column)
+            for name, before, _, column in query_plans.compare()
+        }
+        for name in ('Посты автора по дате', 'Главная за курсором',
+                     'Посты группы за курсором', 'Комментарии поста'):
+            with self.subTest(query=name):
+                self.assertFalse(query_plans.is_range_scan(*plans[name]))
+
+    def test_prefix_only_is_not_range(self):
+        """Префикс индекса без диапазона по колонке курсора не засчитан."""
+        plan = ['SEARCH posts_post USING INDEX post_group_pub_date_idx '
+                '(group_id=?)']
+        self.assertTrue(query_plans.is_range_scan(plan))
+        self.assertFalse(query_plans.is_range_scan(plan, 'pub_date'))
+
+    def test_command(self):
+        """Команда печатает планы с именами индексов."""
+        out = StringIO()
+        call_command('explain_hot_queries', stdout=out)
+        self.assertIn('post_author_pub_date_idx', out.getvalue())
@@ -0,0 +1,209 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from .. import admin as posts_admin
+from .. import search
+from ..models import Comment, Group, Post, SearchTerm, User
+from ..settings import PER_PAGE
+from ..stemmer import stem, tokenize
+
+SEARCH = reverse('posts:search')
+
+
+def found(query, kind=search.POST):
+    return search.matching_ids(kind, query)
+
+
+class StemmerTests(SimpleTestCase):
+    def test_russian_forms(self):
+        """Формы одного русского слова сводятся к одной основе."""
+        for words in (
+            ('горы', 'горах', 'гору'),
+            ('путешествие', 'путешествия', 'путешествиями'),
+            ('красивый', 'красивая', 'красивейший'),
+            ('читать', 'читали', 'читающий'),
+        ):
+            with self.subTest(words=words):
+                self.assertEqual(len({stem(word) for word in words}), 1)
+
+    def test_english_forms(self):
+        """Английские формы тоже сводятся к одной основе."""
+        for words in (
+            ('run', 'runs', 'running'),
+            ('city', 'cities'),
+            ('stop', 'stopped'),
+        ):
+            with self.subTest(words=words):
+                self.assertEqual(len({stem(word) for word in words}), 1)
+
+    def test_tokenize(self):
+        """Регистр, «ё», стоп-слова и знаки препинания не мешают."""
+        self.assertEqual(
+            tokenize('Ёлки и ЕЛКИ, the trees!'), ['елк', 'елк', 'tree']
+        )
+
+
+class PostingsTests(SimpleTestCase):
+    def test_round_trip(self):
+        """Постинги восстанавливаются из байтов без потерь."""
+        postings = {1: 1, 2: 3, 300: 1, 10 ** 6: 200}
+        self.assertEqual(search.decode(search.encode(postings)), postings)
+
+    def test_delta_encoding_is_compact(self):
+        """Соседние id занимают по байту на разницу и частоту."""
+        postings = {pk: 1 for pk in range(10 ** 6, 10 ** 6 + 1000)}
+        self.assertLess(len(search.encode(postings)), 2010)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(
+            title='Путешествия', slug='travel', description='Горы и реки'
+        )
+        cls.mountains = Post.objects.create(
+            text='Поднялись в горы на рассвете', author=cls.author,
+            group=cls.group,
+        )
+        cls.sea = Post.objects.create(
+            text='Море, море и снова море', author=cls.author
+        )
+
+    def test_finds_other_forms(self):
+        """Запрос находит пост по другой форме слова и по группе."""
+        self.assertEqual(found('горах'), {self.mountains.pk})
+        self.assertEqual(found('путешествие'), {self.mountains.pk})
+        self.assertEqual(found('морями'), {self.sea.pk})
+        self.assertEqual(found('горы моря'), set())
+        self.assertEqual(found('рекам'), {self.mountains.pk})
+
+    def test_index_follows_saves(self):
+        """Правка, смена группы, переименование, новое описание группы
+        и удаление двигают индекс."""
+        sea = Post.objects.get(pk=self.sea.pk)
+        sea.text = 'Океан'
+        sea.save()
+        self.assertEqual(found('море'), set())
+        self.assertEqual(found('океаны'), {sea.pk})
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Походы'
+        group.save()
+        self.assertEqual(found('поход'), {self.mountains.pk})
+        self.assertEqual(found('путешествия'), set())
+        group.description = 'Озёра'
+        group.save()
+        self.assertEqual(found('озеро'), {self.mountains.pk})
+        self.assertEqual(found('реки'), set())
+        mountains = Post.objects.get(pk=self.mountains.pk)
+        mountains.group = None
+        mountains.save()
+        self.assertEqual(found('поход'), set())
+        mountains.delete()
+        self.assertEqual(found('рассвет'), set())
+        self.assertFalse(SearchTerm.objects.filter(term='рассвет').exists())
+
+    def test_save_rewrites_one_block(self):
+        """Сохранение переписывает только блок своего id: соседний блок
+        частой основы не читается и не меняется, а поиск и счёт
+        документов идут по всем блокам."""
+        far = Post.objects.create(
+            pk=search.BLOCK_IDS * 3 + 1, text='Тёплое море',
+            author=self.author,
+        )
+        blocks = dict(SearchTerm.objects.filter(
+            kind=search.POST, term='мор'
+        ).values_list('block', 'documents'))
+        self.assertEqual(blocks, {0: 1, 3: 1})
+        self.assertEqual(found('море'), {self.sea.pk, far.pk})
+        near = SearchTerm.objects.get(term='мор', block=0).postings
+        with mock.patch.object(
+            search, 'decode', wraps=search.decode
+        ) as decode:
+            far.text = 'Море, море'
+            far.save()
+        self.assertEqual(decode.call_count, 2)
+        self.assertEqual(
+            bytes(SearchTerm.objects.get(term='мор', block=0).postings),
+            bytes(near),
+        )
+
+    def test_comments(self):
+        """Комментарии индексируются отдельно от постов."""
+        comment = Comment.objects.create(
+            post=self.sea, author=self.author, text='Какой закат!'
+        )
+        self.assertEqual(found('закаты', search.COMMENT), {comment.pk})
+        comment.delete()
+        self.assertEqual(found('закаты', search.COMMENT), set())
+
+    def test_view_ranks_and_paginates(self):
+        """Выдача упорядочена по релевантности и разбита на страницы."""
+        for i in range(PER_PAGE):
+            Post.objects.create(text=f'Про море {i}', author=self.author)
+        response = self.client.get(SEARCH, {'q': 'море'})
+        self.assertEqual(response.context['page_obj'][0], self.sea)
+        self.assertEqual(
+            response.context['page_obj'].paginator.count, PER_PAGE + 1
+        )
+        response = self.client.get(SEARCH, {'q': 'море', 'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 1)
+
+    def test_empty_query(self):
+        """Пустой запрос и одни стоп-слова ничего не находят."""
+        for query in ('  ', 'и в на'):
+            with self.subTest(query=query):
+                response = self.client.get(SEARCH, {'q': query})
+                self.assertEqual(
+                    response.context['page_obj'].paginator.count, 0
+                )
+
+    def test_admin_uses_index(self):
+        """Поиск в админке постов и комментариев идёт через индекс."""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'password')
+        self.client.force_login(admin)
+        Comment.objects.create(
+            post=self.sea, author=self.author, text='Какой закат!'
+        )
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'горах'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.mountains]
+        )
+        response = self.client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'закаты'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_admin_caps_matches(self):
+        """Частая основа не упирается в лимит параметров SQLite: админка
+        показывает только самые новые совпадения."""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'password')
+        self.client.force_login(admin)
+        newer = [
+            Post.objects.create(text=text, author=self.author).pk
+            for text in ('Снова море', 'Опять море')
+        ]
+        with mock.patch.object(posts_admin, 'SEARCH_LIMIT', 2):
+            response = self.client.get(
+                reverse('admin:posts_post_changelist'), {'q': 'море'}
+            )
+        self.assertEqual(
+            {post.pk for post in response.context['cl'].result_list},
+            set(newer),
+        )
+
+    def test_rebuild_command(self):
+        """Команда подхватывает записи, прошедшие мимо сигналов."""
+        Post.objects.bulk_create([
+            Post(text='Лесная тропа', author=self.author)
+        ])
+        self.assertEqual(found('лес'), set())
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(found('тропы')), 1)
+        self.assertEqual(found('горы'), {self.mountains.pk})
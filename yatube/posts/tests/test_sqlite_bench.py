@@ -0,0 +1,23 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from .. import sqlite_bench
+
+
+@skipUnless(connection.vendor == 'sqlite', 'бенчмарк SQLite')
+class SQLiteBenchTests(TestCase):
+    def test_run(self):
+        """Короткий прогон и пишет, и читает на копии базы."""
+        totals = sqlite_bench.run({}, writers=1, readers=1, seconds=0.2)
+        self.assertGreater(totals['writes'], 0)
+        self.assertGreater(totals['reads'], 0)
+
+    def test_command(self):
+        """Команда сравнивает прогон без настройки и с SQLITE_PRAGMAS."""
+        out = StringIO()
+        call_command('sqlite_benchmark', seconds=0.1, stdout=out)
+        self.assertIn('Операций в секунду', out.getvalue())
@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import archive, counters, thumbnails
+from ..models import ImageBlob, Post, User
+from ..storage import ContentAddressedStorage, image_storage
+from .utils import RED_GIF, SMALL_GIF, jpeg
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class StorageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, content, name='picture.gif'):
+        post = Post.objects.create(text='Картинка', author=self.author)
+        post.image.save(name, ContentFile(content))
+        return post
+
+    def references(self, name):
+        return ImageBlob.objects.get(name=name).references
+
+    def test_same_content_stored_once(self):
+        """Одинаковые картинки ложатся в один файл с именем по SHA-256
+        в шардированном каталоге."""
+        first = self.post(SMALL_GIF, 'first.gif')
+        second = self.post(SMALL_GIF, 'second.GIF')
+        name = first.image.name
+        self.assertRegex(
+            name, r'^posts/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}\.gif$'
+        )
+        self.assertEqual(second.image.name, name)
+        self.assertNotEqual(self.post(RED_GIF).image.name, name)
+        directory = os.path.dirname(image_storage.path(name))
+        self.assertEqual(os.listdir(directory), [os.path.basename(name)])
+        self.assertEqual(self.references(name), 2)
+
+    def test_thumbnails_cut_once(self):
+        """Варианты общей картинки режутся один раз на все посты."""
+        first = self.post(jpeg().read(), 'picture.jpg')
+        thumbnails.generate(first.image.name)
+        second = self.post(jpeg().read(), 'copy.jpg')
+        with mock.patch.object(
+            ContentAddressedStorage, 'exists', side_effect=AssertionError
+        ):
+            image = thumbnails.ready_image(second.image)
+        self.assertEqual(image.src.width, 960)
+
+    def test_delete_keeps_referenced_file(self):
+        """Файл удаляется, только когда на него не ссылается ни один пост."""
+        first = self.post(SMALL_GIF)
+        second = self.post(SMALL_GIF)
+        name = first.image.name
+        first.delete()
+        image_storage.delete(name)
+        self.assertTrue(image_storage.exists(name))
+        second.image = ContentFile(RED_GIF, name='red.gif')
+        second.save()
+        self.assertEqual(self.references(name), 0)
+        self.assertEqual(self.references(second.image.name), 1)
+        image_storage.delete(name)
+        self.assertFalse(image_storage.exists(name))
+        self.assertFalse(ImageBlob.objects.filter(name=name).exists())
+
+    def test_archive_keeps_references(self):
+        """Архивный пост держит ссылку, а reconcile её пересчитывает."""
+        post = self.post(SMALL_GIF)
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(days=400)
+        )
+        archive.archive(days=365)
+        self.assertEqual(self.references(post.image.name), 1)
+        ImageBlob.objects.all().delete()
+        counters.reconcile()
+        self.assertEqual(self.references(post.image.name), 1)
+        image_storage.delete(post.image.name)
+        self.assertTrue(image_storage.exists(post.image.name))
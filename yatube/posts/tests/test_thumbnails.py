@@ -0,0 +1,154 @@
+import shutil
+import tempfile
+import threading
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import features
+
+from .. import thumbnails
+from ..models import Post, User
+from .utils import SMALL_GIF, jpeg
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(text='Картинка', author=self.author)
+        self.post.image.save('picture.jpg', jpeg())
+
+    def test_generate_then_ready(self):
+        """После нарезки варианты всех ширин читаются без обращений
+        к хранилищу файлов."""
+        thumbnails.generate(self.post.image.name)
+        with mock.patch.object(
+            FileSystemStorage, 'exists', side_effect=AssertionError
+        ):
+            image = thumbnails.ready_image(self.post.image)
+        self.assertEqual((image.src.width, image.src.height), (960, 339))
+        self.assertEqual(
+            [candidate.split()[1]
+             for candidate in image.fallback_srcset.split(', ')],
+            ['320w', '640w', '960w'],
+        )
+
+    def test_small_image_not_upscaled(self):
+        """Маленькая картинка не растягивается, а одинаковые варианты
+        попадают в srcset один раз."""
+        post = Post.objects.create(text='Маленькая', author=self.author)
+        post.image.save('small.gif', ContentFile(SMALL_GIF))
+        image = thumbnails.ready_image(post.image)
+        self.assertEqual((image.src.width, image.src.height), (2, 1))
+        self.assertEqual(image.fallback_srcset.count('w'), 1)
+
+    @skipUnless(features.check('webp'), 'Pillow без WebP')
+    def test_webp_source(self):
+        """С поддержкой WebP перед <img> идёт <source> в WebP."""
+        image = thumbnails.ready_image(self.post.image)
+        self.assertEqual(image.sources[0][0], 'image/webp')
+
+    def test_ready_without_image(self):
+        """У поста без картинки вариантов нет."""
+        self.assertIsNone(
+            thumbnails.ready_image(Post(text='Без картинки').image)
+        )
+
+    def test_page_resolved_in_one_lookup(self):
+        """Миниатюры страницы читаются одним запросом к kvstore,
+        а из прогретого кеша — без запросов."""
+        posts = [self.post]
+        for number in range(3):
+            post = Post.objects.create(
+                text=f'Пост {number}', author=self.author
+            )
+            post.image.save(f'picture{number}.jpg', jpeg())
+            thumbnails.generate(post.image.name)
+            posts.append(post)
+        posts.append(
+            Post.objects.create(text='Без картинки', author=self.author)
+        )
+        thumbnails.generate(self.post.image.name)
+        cache.clear()
+        with self.assertNumQueries(1):
+            page = thumbnails.PageThumbnails(posts)
+            found = [page.get(post) for post in posts]
+        self.assertEqual(
+            [image and image.src.width for image in found],
+            [960, 960, 960, 960, None],
+        )
+        with self.assertNumQueries(0):
+            page = thumbnails.PageThumbnails(posts)
+            self.assertEqual(page.get(posts[1]).src.url, found[1].src.url)
+
+    def test_generate_changes_post_etag(self):
+        """Нарезка картинки меняет ETag страницы поста: клиент со старым
+        получает страницу с картинкой, а не 304."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        with mock.patch.object(thumbnails.worker, 'put'):
+            etag = self.client.get(url)['ETag']
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        thumbnails.generate(self.post.image.name)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'srcset=')
+
+    @override_settings(THUMBNAIL_WORKER=True)
+    def test_queued_image_not_reread(self):
+        """С фоновым потоком недостающие варианты ставятся в очередь,
+        а kvstore второй раз в том же запросе не читается."""
+        cache.clear()
+        with mock.patch.object(thumbnails.worker, 'put') as put, \
+                self.assertNumQueries(1):
+            self.assertIsNone(thumbnails.ready_image(self.post.image))
+        put.assert_called_once_with(self.post.image.name)
+
+    def test_feed_shows_thumbnail(self):
+        """Главная выводит картинку поста с srcset и размерами."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'srcset=')
+        self.assertContains(response, 'width="960" height="339"')
+
+
+@override_settings(THUMBNAIL_WORKER=True)
+class WorkerTests(TestCase):
+    def test_pending_name_queued_once(self):
+        """Картинка, которая ещё ждёт нарезки, второй раз не ставится,
+        а ошибка нарезки не роняет поток."""
+        release = threading.Event()
+        calls = []
+
+        def generate(name):
+            calls.append(name)
+            release.wait(5)
+            raise OSError('битый файл')
+
+        worker = thumbnails.Worker()
+        with mock.patch.object(thumbnails, 'generate', generate), \
+                mock.patch.object(thumbnails, 'close_old_connections'), \
+                mock.patch.object(thumbnails.logger, 'exception'):
+            worker.put('posts/a.gif')
+            worker.put('posts/a.gif')
+            release.set()
+            worker.queue.join()
+            worker.put('posts/b.gif')
+            worker.queue.join()
+        self.assertEqual(calls, ['posts/a.gif', 'posts/b.gif'])
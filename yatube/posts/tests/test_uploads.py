@@ -0,0 +1,150 @@
+import shutil
+import tempfile
+import tracemalloc
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpRequest
+from django.http.multipartparser import MultiPartParser
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image, ImageFile
+from sorl.thumbnail import default
+
+from .. import thumbnails, uploads
+from ..models import Post, User
+from ..settings import MAX_UPLOAD_SIZE
+from .utils import jpeg
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CHUNK_SIZE = 64 * 1024
+# Потолок памяти на разбор одной загрузки: несколько кусков запроса.
+MEMORY_CEILING = 16 * CHUNK_SIZE
+
+
+def upload(width=1200, height=600):
+    return SimpleUploadedFile(
+        'picture.jpg', jpeg(width, height).read(), content_type='image/jpeg'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class UploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def create(self):
+        return self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с картинкой', 'image': upload()},
+        )
+
+    def test_upload_saved(self):
+        """Картинка в пределах потолков сохраняется с постом."""
+        self.assertEqual(self.create().status_code, 302)
+        self.assertTrue(Post.objects.get().image)
+
+    def test_oversized_upload_rejected(self):
+        """Файл больше потолка не дописывается, и пост не создаётся."""
+        with mock.patch.object(uploads, 'MAX_UPLOAD_SIZE', 1000):
+            response = self.create()
+            error = uploads.too_large().messages
+        self.assertFormError(response, 'form', 'image', error)
+        self.assertFalse(Post.objects.exists())
+
+    def test_bomb_rejected_by_header(self):
+        """Картинка больше MAX_IMAGE_PIXELS отклоняется без декодирования."""
+        with mock.patch.object(uploads, 'MAX_IMAGE_PIXELS', 1000), \
+                mock.patch.object(ImageFile.ImageFile, 'load',
+                                  side_effect=AssertionError):
+            with self.assertRaisesMessage(ValidationError, 'мегапикселей'):
+                uploads.validate_image(upload())
+            response = self.create()
+        self.assertIn('мегапикселей', str(response.context['form'].errors))
+        self.assertFalse(Post.objects.exists())
+
+
+class StreamedBody:
+    """Тело multipart-запроса с файлом size байт, которое собирается
+    по куску на каждое чтение: сам тест не держит файл в памяти."""
+    boundary = 'BoUnDaRy'
+
+    def __init__(self, size):
+        self.parts = self.generate(size)
+
+    def generate(self, size):
+        yield (
+            f'--{self.boundary}\r\n'
+            'Content-Disposition: form-data; name="image"; '
+            'filename="big.jpg"\r\n'
+            'Content-Type: image/jpeg\r\n\r\n'
+        ).encode()
+        chunk = bytes(CHUNK_SIZE)
+        for _ in range(size // CHUNK_SIZE):
+            yield chunk
+        yield f'\r\n--{self.boundary}--\r\n'.encode()
+
+    def read(self, size=-1):
+        return next(self.parts, b'')
+
+
+class UploadMemoryTests(SimpleTestCase):
+    def peak(self, size):
+        """Пик памяти Python за разбор запроса с файлом size байт."""
+        request = HttpRequest()
+        meta = {
+            'CONTENT_TYPE':
+                f'multipart/form-data; boundary={StreamedBody.boundary}',
+            'CONTENT_LENGTH': str(size + 1024),
+        }
+        tracemalloc.start()
+        try:
+            files = MultiPartParser(
+                meta, StreamedBody(size),
+                [uploads.BoundedUploadHandler(request)],
+            ).parse()[1]
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        for file in files.values():
+            file.close()
+        return files, uploads.rejected(request), peak
+
+    def test_peak_memory_bounded(self):
+        """Файл у потолка и файл втрое больше разбираются с пиком памяти
+        в несколько кусков, а не в размер файла."""
+        files, rejected, peak = self.peak(MAX_UPLOAD_SIZE - CHUNK_SIZE)
+        self.assertEqual(
+            files['image'].size, MAX_UPLOAD_SIZE - CHUNK_SIZE
+        )
+        self.assertLess(peak, MEMORY_CEILING)
+        files, rejected, peak = self.peak(MAX_UPLOAD_SIZE * 3)
+        self.assertNotIn('image', files)
+        self.assertIn('image', rejected)
+        self.assertLess(peak, MEMORY_CEILING)
+
+
+class EngineTests(TestCase):
+    def test_jpeg_decoded_with_draft(self):
+        """Большой JPEG декодируется сразу уменьшенным в 8 раз,
+        а вариант выходит нужного размера."""
+        image = Image.open(BytesIO(jpeg(4000, 2000).read()))
+        options = dict(
+            default.backend.default_options, crop='center', format='JPEG',
+            blur=None,
+        )
+        thumbnail = thumbnails.Engine().create(image, (320, 113), options)
+        self.assertEqual(image.size, (500, 250))
+        self.assertEqual(thumbnail.size, (320, 113))
@@ -2,8 +2,9 @@ from django import forms
 from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
-from posts.models import Follow, Group, Post, User
+from posts.models import Comment, Follow, Group, Post, User
 
+from .. import counters
 from ..forms import PostForm
 from ..settings import PER_PAGE
 
@@ -264,4 +265,128 @@ class FollowTests(TestCase):
         self.assertEqual(len(response_2.context['page_obj']), 0)
 
 
+class QueryBudgetTests(TestCase):
+    """Число запросов страниц не зависит от числа постов на них."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author', first_name='Имя')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='budget', description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(TOTAL_POSTS):
+            cls.post = Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=cls.group
+            )
+        Comment.objects.bulk_create([
+            Comment(post=cls.post, author=cls.reader, text='Комментарий')
+            for i in range(PER_PAGE)
+        ])
+        counters.rebuild()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_query_budget(self):
+        budgets = [
+            [INDEX, 4],
+            [reverse('posts:group_list', args=(self.group.slug,)), 6],
+            [reverse('posts:profile', args=(self.author.username,)), 6],
+            [reverse('posts:post_detail', args=(self.post.pk,)), 6],
+            [reverse('posts:follow_index'), 5],
+        ]
+        for url, budget in budgets:
+            with self.subTest(url=url):
+                with self.assertNumQueries(budget):
+                    self.client.get(url)
+
+
+class ConditionalGetTests(TestCase):
+    """Неизменившиеся страницы отдаются ответом 304."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='etag', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group
+        )
+        cls.urls = [
+            INDEX,
+            reverse('posts:group_list', args=(cls.group.slug,)),
+            reverse('posts:profile', args=(cls.author.username,)),
+            reverse('posts:post_detail', args=(cls.post.pk,)),
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def etags(self):
+        return [self.client.get(url)['ETag'] for url in self.urls]
+
+    def assertChanged(self, etags, changed):
+        for url, etag, expected in zip(self.urls, etags, changed):
+            with self.subTest(url=url):
+                status = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(status.status_code, 200 if expected else 304)
+
+    def test_not_modified(self):
+        """Повторный запрос с тем же ETag не рендерит страницу."""
+        etags = self.etags()
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertFalse(response.templates)
+
+    def test_new_post(self):
+        """Новый пост автора в группе меняет все страницы."""
+        etags = self.etags()
+        Post.objects.create(text='Ещё', author=self.author, group=self.group)
+        self.assertChanged(etags, [True, True, True, True])
+
+    def test_edit_and_comment(self):
+        """Правка и комментарий меняют страницу поста."""
+        etags = self.etags()
+        Comment.objects.create(post=self.post, author=self.reader, text='К')
+        self.assertChanged(etags, [False, False, False, True])
+        etags = self.etags()
+        self.post.text = 'Правка'
+        self.post.save()
+        self.assertChanged(etags, [True, True, True, True])
+
+    def test_follow_and_user(self):
+        """Подписка меняет профиль, другой пользователь — все страницы."""
+        etags = self.etags()
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertChanged(etags, [False, False, True, False])
+        etags = self.etags()
+        self.client.force_login(self.author)
+        self.assertChanged(etags, [True, True, True, True])
+
+    def test_relogin_changes_post_etag(self):
+        """Новый вход меняет CSRF-токен, и страница поста с формой
+        комментария отдаётся заново, а не 304 со старым токеном."""
+        self.reader.set_password('пароль')
+        self.reader.save()
+        credentials = {'username': 'reader', 'password': 'пароль'}
+        client = Client()
+        client.post(reverse('users:login'), credentials)
+        url = self.urls[3]
+        etag = client.get(url)['ETag']
+        self.assertEqual(
+            client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        client.logout()
+        client.post(reverse('users:login'), credentials)
+        self.assertEqual(
+            client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+
 cache.clear()
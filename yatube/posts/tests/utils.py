@@ -0,0 +1,21 @@
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+# Та же картинка другого цвета: в хранилище по содержимому — другой файл.
+RED_GIF = SMALL_GIF.replace(b'\xFF\xFF\xFF', b'\xFF\x00\x00')
+
+
+def jpeg(width=1200, height=600):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), 'teal').save(buffer, 'JPEG')
+    return ContentFile(buffer.getvalue())
@@ -0,0 +1,297 @@
+"""Варианты картинок постов: фоновая нарезка и чтение готовых.
+
+post_create и post_edit сразу после сохранения ставят картинку в очередь,
+и фоновый поток режет все варианты из VARIANTS: ширины IMAGE_WIDTHS
+в форматах IMAGE_FORMATS. Шаблоны берут только варианты, уже записанные
+в kvstore sorl вместе с размерами, и не декодируют картинки внутри
+запроса. Недостающие варианты тоже ставятся в очередь, а после нарезки
+версии лент поста и его страницы поднимаются, чтобы закешированные
+фрагменты лент перерисовались уже с картинкой, а старый ETag страницы
+поста перестал совпадать.
+
+Лентам варианты всей страницы достаёт PageThumbnails: один get_many
+из кеша kvstore и один запрос к его таблице на промахи вместо
+обращения к kvstore на каждый вариант каждого поста.
+
+Engine перед нарезкой JPEG включает у Pillow draft(): декодер сразу
+отдаёт кадр, уменьшенный в 2–8 раз, но не меньше нужного варианта,
+и полный кадр большой картинки в памяти не собирается.
+"""
+import logging
+import math
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from PIL import features
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.engines.pil_engine import Engine as PILEngine
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+from sorl.thumbnail.models import KVStore
+
+from . import feed_cache
+from .models import ArchivedPost, Post
+from .settings import IMAGE_FORMATS, IMAGE_RATIO, IMAGE_SIZES, IMAGE_WIDTHS
+from .signals import bump_post_feeds
+from .storage import image_storage
+
+logger = logging.getLogger(__name__)
+FALLBACK = 'JPEG'
+MIME_TYPES = {'WEBP': 'image/webp', 'JPEG': 'image/jpeg'}
+FORMATS = tuple(
+    image_format for image_format in IMAGE_FORMATS
+    if image_format != 'WEBP' or features.check('webp')
+)
+# (формат, геометрия sorl, параметры) каждого варианта.
+VARIANTS = tuple(
+    (image_format, f'{width}x{round(width * IMAGE_RATIO)}',
+     {'crop': 'center', 'upscale': False, 'format': image_format})
+    for image_format in FORMATS for width in IMAGE_WIDTHS
+)
+
+
+class Engine(PILEngine):
+    """Движок sorl, который декодирует JPEG сразу уменьшенным."""
+
+    def create(self, image, geometry, options):
+        if image.format == 'JPEG' and not options.get('cropbox') and (
+            None not in geometry
+        ):
+            width, height = image.size
+            if self._flip_dimensions(image):
+                factor = self._calculate_scaling_factor(
+                    height, width, geometry, options
+                )
+            else:
+                factor = self._calculate_scaling_factor(
+                    width, height, geometry, options
+                )
+            if factor < 1:
+                image.draft(None, (math.ceil(width * factor),
+                                   math.ceil(height * factor)))
+        return super().create(image, geometry, options)
+
+
+def generate(name):
+    """Режет все варианты картинки name, которых ещё нет."""
+    source = ImageFile(name, image_storage)
+    for image_format, geometry, options in VARIANTS:
+        get_thumbnail(source, geometry, **options)
+    for post in Post.objects.filter(image=name):
+        bump_post_feeds(post)
+        feed_cache.bump((feed_cache.POST, post.pk))
+    for post_id in ArchivedPost.objects.filter(
+        image=name
+    ).values_list('pk', flat=True):
+        feed_cache.bump((feed_cache.POST, post_id))
+
+
+class Worker:
+    """Фоновый поток с очередью имён картинок.
+
+    Поток заводится при первой задаче в каждом процессе. Имя, которое
+    уже ждёт в очереди, второй раз не ставится. Без THUMBNAIL_WORKER
+    задача выполняется сразу, в вызывающем потоке.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def put(self, name):
+        if not settings.THUMBNAIL_WORKER:
+            generate(name)
+            return
+        with self.lock:
+            if name in self.pending:
+                return
+            self.pending.add(name)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='thumbnails', daemon=True
+                )
+                self.thread.start()
+        self.queue.put(name)
+
+    def run(self):
+        while True:
+            name = self.queue.get()
+            try:
+                generate(name)
+            except Exception:
+                logger.exception('Не удалось нарезать миниатюры %s', name)
+            finally:
+                with self.lock:
+                    self.pending.discard(name)
+                close_old_connections()
+                self.queue.task_done()
+
+
+worker = Worker()
+
+
+def schedule(post):
+    """Ставит картинку поста в очередь после коммита транзакции."""
+    if post.image:
+        name = post.image.name
+        transaction.on_commit(lambda: worker.put(name))
+
+
+def _thumbnail_file(source, geometry, options):
+    """Миниатюра, которую sorl сделал бы для source: то же имя
+    и тот же ключ kvstore, что в ThumbnailBackend.get_thumbnail."""
+    backend = default.backend
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return ImageFile(
+        backend._get_thumbnail_filename(source, geometry, options),
+        default.storage,
+    )
+
+
+def _get_many(thumbnails):
+    """{ключ kvstore: миниатюра} для найденных из thumbnails."""
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDBStore):
+        found = (kvstore.get(thumbnail) for thumbnail in thumbnails)
+        return {
+            thumbnail.key: thumbnail for thumbnail in found if thumbnail
+        }
+    keys = {add_prefix(thumbnail.key): thumbnail.key
+            for thumbnail in thumbnails}
+    values = kvstore.cache.get_many(keys)
+    missing = keys.keys() - values.keys()
+    if missing:
+        rows = dict(KVStore.objects.filter(
+            key__in=missing
+        ).values_list('key', 'value'))
+        kvstore.cache.set_many(rows, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(rows)
+    return {
+        keys[key]: deserialize_image_file(value)
+        for key, value in values.items() if value != EMPTY_VALUE
+    }
+
+
+class ResponsiveImage:
+    """Готовые варианты картинки для <picture>.
+
+    src, width и height — у самого широкого варианта в запасном формате.
+    """
+    sizes = IMAGE_SIZES
+
+    def __init__(self, variants):
+        self.variants = variants
+
+    def srcset(self, image_format):
+        widths, candidates = set(), []
+        for variant_format, thumbnail in self.variants:
+            if variant_format == image_format and (
+                thumbnail.width not in widths
+            ):
+                widths.add(thumbnail.width)
+                candidates.append(f'{thumbnail.url} {thumbnail.width}w')
+        return ', '.join(candidates)
+
+    @property
+    def sources(self):
+        """(MIME-тип, srcset) для <source> всех форматов, кроме запасного."""
+        return [
+            (MIME_TYPES[image_format], self.srcset(image_format))
+            for image_format in FORMATS
+            if image_format != FALLBACK and self.srcset(image_format)
+        ]
+
+    @property
+    def fallback_srcset(self):
+        return self.srcset(FALLBACK)
+
+    @property
+    def src(self):
+        return max(
+            (thumbnail for image_format, thumbnail in self.variants
+             if image_format == FALLBACK),
+            key=lambda thumbnail: thumbnail.width,
+            default=None,
+        )
+
+
+def _expected(image):
+    source = ImageFile(image)
+    return [
+        (image_format, _thumbnail_file(source, geometry, options))
+        for image_format, geometry, options in VARIANTS
+    ]
+
+
+def resolve(images):
+    """Готовые варианты картинок images: {имя: ResponsiveImage или None}.
+
+    None — нет ни одного варианта в запасном формате. Картинка, у которой
+    не хватает вариантов, ставится в очередь.
+    """
+    expected = {image.name: _expected(image) for image in images if image}
+    found = _get_many([
+        thumbnail for variants in expected.values()
+        for image_format, thumbnail in variants
+    ])
+    result = {}
+    for name, variants in expected.items():
+        if any(thumbnail.key not in found for _, thumbnail in variants):
+            worker.put(name)
+            if not settings.THUMBNAIL_WORKER:
+                # Без фонового потока варианты уже нарезаны: дочитываем.
+                found.update(_get_many([
+                    thumbnail for _, thumbnail in variants
+                    if thumbnail.key not in found
+                ]))
+        image = ResponsiveImage([
+            (image_format, found[thumbnail.key])
+            for image_format, thumbnail in variants
+            if thumbnail.key in found
+        ])
+        result[name] = image if image.src else None
+    return result
+
+
+def ready_image(image):
+    """Варианты одной картинки, например для страницы поста."""
+    if not image:
+        return None
+    return resolve([image])[image.name]
+
+
+class PageThumbnails:
+    """Варианты картинок постов страницы, собранные одним заходом.
+
+    Пакет разрешается при первом обращении из шаблона: страница,
+    отданная из кеша фрагментов, в kvstore не ходит вовсе.
+    """
+
+    def __init__(self, posts):
+        self.posts = posts
+        self.resolved = None
+
+    def get(self, post):
+        if not post.image:
+            return None
+        if self.resolved is None:
+            self.resolved = resolve(post.image for post in self.posts)
+        if post.image.name not in self.resolved:
+            return ready_image(post.image)
+        return self.resolved[post.image.name]
@@ -0,0 +1,87 @@
+"""Загрузка картинок постов с ограниченной памятью.
+
+BoundedUploadHandler пишет каждый файл запроса сразу во временный файл
+кусками по chunk_size и бросает его, как только набралось больше
+MAX_UPLOAD_SIZE: такой файл в request.FILES не попадает, а его поле
+запоминается в request.rejected_uploads. validate_image читает у
+картинки только заголовок и отклоняет слишком большие по пикселям,
+не декодируя их. Так в памяти воркера на загрузку лежит один кусок
+запроса, а декодируют картинку уже миниатюры (см. thumbnails.Engine).
+"""
+import warnings
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadhandler import (SkipFile,
+                                             TemporaryFileUploadHandler)
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
+
+from .settings import MAX_IMAGE_PIXELS, MAX_UPLOAD_SIZE
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    """Поток загрузки во временный файл с потолком MAX_UPLOAD_SIZE."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > MAX_UPLOAD_SIZE:
+            rejected(self.request)[self.field_name] = self.received
+            # Парсер закроет и удалит временный файл, а остаток файла
+            # дочитает из запроса вхолостую.
+            raise SkipFile
+        self.file.write(raw_data)
+
+
+def rejected(request):
+    """{поле: сколько байт пришло} для файлов, брошенных из-за размера."""
+    if not hasattr(request, 'rejected_uploads'):
+        request.rejected_uploads = {}
+    return request.rejected_uploads
+
+
+def too_large():
+    return ValidationError(
+        'Файл больше %(limit)s.',
+        code='file_too_large',
+        params={'limit': filesizeformat(MAX_UPLOAD_SIZE)},
+    )
+
+
+def image_size(file):
+    """Ширина и высота картинки по заголовку, без декодирования."""
+    if hasattr(file, 'temporary_file_path'):
+        source = file.temporary_file_path()
+    else:
+        file.seek(0)
+        source = file
+    with warnings.catch_warnings():
+        # Порог Pillow выше нашего: предупреждение ни к чему, а картинку
+        # больше двух порогов Pillow отказывается открывать сам.
+        warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+        try:
+            with Image.open(source) as image:
+                return image.size
+        except Image.DecompressionBombError:
+            return None
+        finally:
+            if source is file:
+                file.seek(0)
+
+
+def validate_image(file):
+    """Отклоняет файл больше MAX_UPLOAD_SIZE и картинку больше
+    MAX_IMAGE_PIXELS пикселей — «бомбу», которая раздуется при
+    декодировании."""
+    if file.size > MAX_UPLOAD_SIZE:
+        raise too_large()
+    size = image_size(file)
+    if size is None or size[0] * size[1] > MAX_IMAGE_PIXELS:
+        raise ValidationError(
+            'Картинка больше %(limit)s мегапикселей.',
+            code='image_too_large',
+            params={'limit': MAX_IMAGE_PIXELS // 10 ** 6},
+        )
@@ -1,56 +1,89 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import (Http404, HttpResponseBadRequest,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.views.decorators.http import condition
 
+from . import (archive, counters, etags, exporter, feed_cache, feeds,
+               search, thumbnails, uploads)
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
-from .settings import PER_PAGE
+from .paginators import MergedCursorPaginator, paginate
+from .settings import FEED_CACHE_TTL, PER_PAGE
 
 
+@condition(etag_func=etags.index_etag)
 def index(request):
     '''для главной страницы'''
     posts = Post.objects.all()[:PER_PAGE]
     # Показывать по 10 записей на странице.
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, PER_PAGE)
+    cache_key = feed_cache.page_key(request, feed_cache.INDEX)
+    page_obj = paginate(
+        request, Post.objects.for_feed(), count_key=counters.ALL_KEY,
+        cache_key=cache_key,
+    )
     template = 'posts/index.html'
     description = 'Небольшое описание'
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
     context = {
         'posts': posts,
         'page_obj': page_obj,
-        'description': description
+        'description': description,
+        'post_thumbnails': thumbnails.PageThumbnails(page_obj),
+        'feed_cache_key': cache_key,
+        'feed_cache_ttl': FEED_CACHE_TTL,
     }
     return render(request, template, context)
 
 
+@condition(etag_func=etags.group_etag)
 def group_posts(request, slug):
     '''для страницы, на которой будут посты, отфильтрованные по группам.'''
     group = get_object_or_404(Group, slug=slug)
     template = 'posts/group_list.html'
     text = 'Здесь будет информация о группах проекта Yatube'
     description = 'Небольшое описание'
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Версию ленты группы поднимают сигналы Post при создании поста,
+    # правке и смене группы — из формы, из админки или из кода.
+    cache_key = feed_cache.page_key(request, feed_cache.GROUP, group.pk)
+    page_obj = paginate(
+        request, group.posts.for_feed(),
+        count_key=counters.group_key(group.pk), cache_key=cache_key,
+    )
     context = {
         'group': group,
         'text': text,
         'page_obj': page_obj,
-        'description': description
+        'description': description,
+        'post_thumbnails': thumbnails.PageThumbnails(page_obj),
+        'feed_cache_key': cache_key,
+        'feed_cache_ttl': FEED_CACHE_TTL,
     }
     return render(request, template, context)
 
 
+@condition(etag_func=etags.profile_etag)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, 2)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    stats = counters.user_stats(author)
+    if stats.archived_posts_count:
+        # Архивные посты автора идут после свежих, курсор (pub_date, id)
+        # общий для обеих таблиц.
+        page_obj = paginate(
+            request, author.posts.all(), 2, count=stats.total_posts,
+            paginator_class=MergedCursorPaginator, streams=[
+                (author.posts.for_feed(), ('pub_date', 'pk')),
+                (author.archived_posts.for_feed(), ('pub_date', 'pk')),
+            ],
+        )
+    else:
+        page_obj = paginate(
+            request, author.posts.for_feed(), 2, count=stats.posts_count
+        )
     following = (
         request.user.is_authenticated
         and request.user != author
@@ -63,14 +96,19 @@ def profile(request, username):
         request,
         'posts/profile.html', {
             'page_obj': page_obj,
+            'post_thumbnails': thumbnails.PageThumbnails(page_obj),
             'author': author,
+            'stats': stats,
             'following': following,
         }
     )
 
 
+@condition(etag_func=etags.post_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = archive.get_post(post_id)
+    if post is None:
+        raise Http404
     form = CommentForm(request.POST or None)
     comments = post.comments.all()  # type: ignore
     context = {
@@ -83,11 +121,13 @@ def post_detail(request, post_id):
 
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None, files=request.FILES or None)
+    form = PostForm(request.POST or None, files=request.FILES or None,
+                    rejected_uploads=uploads.rejected(request))
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         form.save()
+        thumbnails.schedule(post)
         return redirect('posts:profile', request.user)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -98,9 +138,10 @@ def post_edit(request, post_id):
     if request.user != post.author:
         return redirect('posts:post_detail', post.pk,)
     form = PostForm(request.POST or None, files=request.FILES or None,
-                    instance=post)
+                    instance=post, rejected_uploads=uploads.rejected(request))
     if form.is_valid():
         post.save()
+        thumbnails.schedule(post)
         return redirect('posts:post_detail', post.pk,)
     is_edit = True
     context = {'form': form, 'is_edit': is_edit}
@@ -121,14 +162,66 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    context = {'page_obj': page_obj}
+    celebrities = feeds.followed_celebrities(request.user)
+    cache_key = feed_cache.page_key(
+        request, feed_cache.FOLLOW, request.user.pk,
+        [(feed_cache.AUTHOR, author_id) for author_id in celebrities],
+    )
+    page_obj = paginate(
+        request,
+        Post.objects.filter(author__following__user=request.user),
+        count=counters.follow_count(request.user.pk),
+        paginator_class=MergedCursorPaginator,
+        cache_key=cache_key,
+        streams=feeds.feed_streams(request.user, celebrities),
+    )
+    context = {
+        'page_obj': page_obj,
+        'post_thumbnails': thumbnails.PageThumbnails(page_obj),
+        'feed_cache_key': cache_key,
+        'feed_cache_ttl': FEED_CACHE_TTL,
+    }
     return render(request, 'posts/follow.html', context)
 
 
+def search_posts(request):
+    """Поиск по текстам постов и группам, самые релевантные — первыми."""
+    query = request.GET.get('q', '').strip()
+    page_obj = Paginator(
+        search.SearchResults(query), PER_PAGE
+    ).get_page(request.GET.get('page'))
+    return render(request, 'posts/search.html', {
+        'query': query,
+        'page_obj': page_obj,
+        'post_thumbnails': thumbnails.PageThumbnails(page_obj),
+    })
+
+
+@staff_member_required
+def export_posts(request):
+    """Выгрузка постов и комментариев потоком, с фильтрами из GET."""
+    file_format = request.GET.get('format', exporter.JSONL)
+    if file_format not in exporter.CONTENT_TYPES:
+        return HttpResponseBadRequest('Неизвестный формат')
+    try:
+        records = exporter.records(
+            request.GET.getlist('type') or exporter.KINDS,
+            *(request.GET.get(name) for name in (
+                'author', 'group', 'since', 'until'
+            )),
+        )
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    response = StreamingHttpResponse(
+        exporter.render(records, file_format),
+        content_type=exporter.CONTENT_TYPES[file_format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="yatube.{file_format}"'
+    )
+    return response
+
+
 @login_required
 def profile_follow(request, username):
     # Подписаться на автора
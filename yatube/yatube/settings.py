@@ -44,6 +44,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -85,6 +86,25 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения: алиасы из DATABASES с копиями default.
+# Чтения идут в них (см. core.routers), а сессия, которая только что
+# писала, ещё REPLICA_STICKY_SECONDS секунд читает из default.
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_STICKY_SECONDS = 10
+
+# Прагмы для каждого нового соединения с SQLite (см. core.db): WAL, чтобы
+# писатели не блокировали читателей, ожидание блокировки вместо ошибки
+# «database is locked», кеш страниц и mmap для чтения лент.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'memory',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -123,10 +143,22 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# Имена с хешем содержимого и сжатые .gz/.br рядом (см. core.staticfiles).
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Статику и медиа отдаёт core.fileserver прямо из WSGI. За front-прокси
+# тело файла можно отдать ему: 'X-Sendfile' (Apache, lighttpd) или
+# 'X-Accel-Redirect' (nginx; тогда путь файла — FILE_SERVER_ACCEL_PREFIX
+# + URL, например internal-локация /protected/media/ с alias MEDIA_ROOT).
+FILE_SERVER_OFFLOAD = None
+FILE_SERVER_ACCEL_PREFIX = '/protected'
+# Сколько клиент кеширует статику без хеша в имени.
+FILE_SERVER_MAX_AGE = 60 * 60
+
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -139,8 +171,23 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Общий для всех воркеров кеш в файле SQLite (см. core.cache).
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'BETA': 1.0,
+            'LOCK_TIMEOUT': 10,
+        },
     }
 }
+
+# Миниатюры картинок постов режет фоновый поток (см. posts.thumbnails).
+THUMBNAIL_WORKER = True
+# JPEG для миниатюр декодируется сразу уменьшенным (см. posts.thumbnails).
+THUMBNAIL_ENGINE = 'posts.thumbnails.Engine'
+
+# Загрузки пишутся во временный файл с потолком размера (см. posts.uploads).
+FILE_UPLOAD_HANDLERS = ['posts.uploads.BoundedUploadHandler']
@@ -0,0 +1,37 @@
+"""Настройки тестов поверх боевых.
+
+python manage.py test выбирает их сам (см. manage.py), pytest — через
+pytest.ini; остальные команды всегда работают с yatube.settings.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+from .settings import CACHES, DATABASES
+
+# Тот же SQLiteCache, что в бою, но в своём файле на каждый прогон:
+# тестовая база пересоздаётся, а общий файл кеша пережил бы её.
+CACHE_DIR = tempfile.mkdtemp()
+atexit.register(shutil.rmtree, CACHE_DIR, ignore_errors=True)
+CACHES = {
+    'default': {
+        **CACHES['default'],
+        'LOCATION': os.path.join(CACHE_DIR, 'cache.sqlite3'),
+    },
+}
+# Отдельная база-«реплика» для тестов роутера, которые подключают её
+# через databases; данные в неё не реплицируются, как при отставании.
+DATABASES = {
+    **DATABASES,
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(os.path.dirname(DATABASES['default']['NAME']),
+                             'replica.sqlite3'),
+    },
+}
+# Поток ходил бы в тестовую базу мимо транзакции теста: режем сразу.
+THUMBNAIL_WORKER = False
+# collectstatic в тестах не запускается, и манифеста нет.
+STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
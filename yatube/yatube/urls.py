@@ -1,7 +1,6 @@
 from django.contrib import admin
 from django.urls import include, path
 from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -14,10 +13,7 @@ handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.csrf_failure'
 
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+# Медиа отдаёт core.fileserver в yatube.wsgi, в том числе и с DEBUG.
 if settings.DEBUG:
     import debug_toolbar
 